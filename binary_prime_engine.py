@@ -1,14 +1,19 @@
-import json
+import os
+import signal
+import sys
+from array import array
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import compress
+from math import gcd, isqrt, prod
 from pathlib import Path
+from typing import Tuple
 
-DB_FILE = Path("binary_codes.json")
-
-# Carica database codici binari conosciuti
-if DB_FILE.exists():
-    with open(DB_FILE, "r") as f:
-        code_db = set(json.load(f))
-else:
-    code_db = set()
+try:
+    import gmpy2
+except ImportError:  # gmpy2 è opzionale: fallback su Miller-Rabin in Python
+    gmpy2 = None
 
 def binary_code(n: int, bits: int = None) -> str:
     """
@@ -21,52 +26,485 @@ def binary_code(n: int, bits: int = None) -> str:
             return "0"
         bits = n.bit_length()
         # Arrotonda a multipli di 4 per leggibilità (nibble)
-        bits = ((bits + 3) // 4) * 4
+        bits = (bits + 3) & ~3
         # Minimo 8 bit per numeri piccoli
-        bits = max(bits, 8)
+        if bits < 8:
+            bits = 8
     
-    return format(n, f'0{bits}b')
+    # zfill vale solo per n >= 0: per i negativi format mette davanti il segno
+    if n < 0:
+        return format(n, f'0{bits}b')
+    return bin(n)[2:].zfill(bits)
+
+def binary_code_ends(n: int, k: int = 20) -> Tuple[str, str, int]:
+    """
+    Prime e ultime k cifre di binary_code(n) e sua lunghezza, senza costruire
+    la stringa completa: per numeri di migliaia di bit bastano due shift.
+    """
+    if n == 0:
+        return "0", "0", 1
+    bits = max(8, (n.bit_length() + 3) & ~3)  # Stessa larghezza di binary_code(n)
+    if n < 0:
+        # Negativi come format(n, f'0{bits}b'): il segno occupa una posizione
+        # della larghezza
+        m = -n
+        width = max(bits - 1, m.bit_length())
+        if width < k:
+            code = format(n, f"0{bits}b")
+            return code, code, len(code)
+        head = ("-" + format(m >> (width - k + 1), f"0{k - 1}b"))[:k]
+        tail = format(m & ((1 << k) - 1), f"0{k}b")
+        return head, tail, width + 1
+    if bits <= k:
+        code = bin(n)[2:].zfill(bits)
+        return code, code, bits
+    return format(n >> (bits - k), f"0{k}b"), format(n & ((1 << k) - 1), f"0{k}b"), bits
+
+# Primi piccoli usati come filtro e come testimoni Miller-Rabin:
+# con i primi 13 numeri primi il test è deterministico per n < 3.3·10^24
+SMALL_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+MR_WITNESSES = SMALL_PRIMES
+# Per n < 2^64 bastano i 7 testimoni di Sinclair: quasi metà delle esponenziazioni
+MR_WITNESSES_64 = (2, 325, 9375, 28178, 450775, 9780504, 1795265022)
+
+# Prodotto dei primi 43..1021: un solo gcd in C sostituisce ~160 divisioni
+SCREEN_PRIMES = tuple(p for p in range(43, 1024, 2) if all(p % q for q in SMALL_PRIMES))
+SCREEN_PRODUCT = prod(SCREEN_PRIMES)
+SCREEN_BOUND = 1031 * 1031  # Sotto il quadrato del primo successivo basta il filtro
+# Primoriale 2·3·…·41: un gcd scarta i multipli dei primi piccoli al posto di
+# 13 divisioni
+SMALL_PRIMORIAL = prod(SMALL_PRIMES)
+
+# Oltre questa soglia le 13 basi non sono più dimostrate deterministiche: BPSW
+# (Miller-Rabin in base 2 + Lucas forte), senza controesempi noti
+MR_BOUND = 3317044064679887385961981
+
+def _jacobi(a: int, n: int) -> int:
+    """Simbolo di Jacobi (a/n) per n dispari positivo."""
+    a %= n
+    result = 1
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+def _strong_lucas_prp(n: int) -> bool:
+    """Test di Lucas forte con i parametri di Selfridge (metodo A), n dispari > 41."""
+    # Con n quadrato perfetto nessun D ha (D/n) = -1
+    if isqrt(n) ** 2 == n:
+        return False
+    # Primo D in 5, -7, 9, -11, ... con (D/n) = -1; P = 1, Q = (1 - D) / 4
+    D = 5
+    while True:
+        j = _jacobi(D, n)
+        if j == -1:
+            break
+        if j == 0 and abs(D) != n:
+            return False
+        D = -D - 2 if D > 0 else -D + 2
+    Q = (1 - D) // 4
+
+    # n+1 = d·2^s con d dispari
+    d = n + 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+
+    # U_d, V_d e Q^d mod n scorrendo i bit di d (P = 1)
+    U, V, Qk = 1, 1, Q % n
+    for bit in bin(d)[3:]:
+        U, V = U * V % n, (V * V - 2 * Qk) % n
+        Qk = Qk * Qk % n
+        if bit == "1":
+            U, V = U + V, D * U + V
+            # Divisione per 2 modulo n (dispari): si somma n ai valori dispari
+            U = (U + n if U & 1 else U) // 2 % n
+            V = (V + n if V & 1 else V) // 2 % n
+            Qk = Qk * Q % n
+
+    if U == 0 or V == 0:
+        return True
+    for _ in range(s - 1):
+        V = (V * V - 2 * Qk) % n
+        Qk = Qk * Qk % n
+        if V == 0:
+            return True
+    return False
+
+def is_prime_mr(n: int) -> bool:
+    """
+    Test di primalità deterministico: Miller-Rabin a 7 basi sotto 2^64, a 13 basi
+    fino a 3.3·10^24, BPSW oltre.
+    """
+    if n < 2:
+        return False
+    if gcd(n, SMALL_PRIMORIAL) != 1:
+        return n in SMALL_PRIMES
+    # Nessun divisore <= 41: sotto 43² il numero è primo senza altri test
+    if n < 43 * 43:
+        return True
+    if gcd(n, SCREEN_PRODUCT) != 1:
+        return False
+    if n < SCREEN_BOUND:
+        return True
+
+    # Scrive n-1 = d·2^s con d dispari
+    d = n - 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+
+    # Oltre MR_BOUND: BPSW, una sola base (2) seguita dal test di Lucas forte
+    if n < 1 << 64:
+        witnesses = MR_WITNESSES_64
+    elif n < MR_BOUND:
+        witnesses = MR_WITNESSES
+    else:
+        witnesses = (2,)
+    for a in witnesses:
+        a %= n
+        if a == 0:
+            continue
+        # pow a tre argomenti resta in C: una riduzione di Montgomery scritta in
+        # Python è più lenta a ogni dimensione (8× a 64 bit, 2× a 512 bit)
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return n < MR_BOUND or _strong_lucas_prp(n)
+
+if gmpy2 is not None:
+    def is_prime(n: int) -> bool:
+        """Test di primalità in C tramite GMP (BPSW, esatto per n < 2^64)."""
+        return bool(gmpy2.is_prime(n))
+else:
+    is_prime = is_prime_mr
+
+# Ruota 2·3·5·7·11 = 2310: solo i 480 residui coprimi sono candidati primi
+WHEEL_MODULUS = 2 * 3 * 5 * 7 * 11
+WHEEL = tuple(k for k in range(WHEEL_MODULUS) if gcd(k, WHEEL_MODULUS) == 1)
+WHEEL_GAPS = tuple(
+    b - a for a, b in zip(WHEEL, WHEEL[1:] + (WHEEL[0] + WHEEL_MODULUS,))
+)
+
+def wheel_candidates(n: int):
+    """Genera in ordine i candidati >= n coprimi con 2, 3, 5, 7, 11."""
+    base = n - n % WHEEL_MODULUS
+    i = bisect_left(WHEEL, n % WHEEL_MODULUS)
+    size = len(WHEEL_GAPS)
+    c = base + WHEEL[i]
+    while True:
+        yield c
+        c += WHEEL_GAPS[i]
+        i += 1
+        if i == size:
+            i = 0
 
 def next_prime_binary(n: int) -> int:
     """Trova il prossimo primo binario usando pattern e gap predittivi."""
-    # Forza n a essere dispari
+    # Casi base
     if n < 2:
         return 2
     if n == 2:
         return 3
-    if n % 2 == 0:
-        n += 1
+    # I primi della ruota vanno gestiti a parte
+    for p in (3, 5, 7, 11):
+        if n <= p:
+            return p
 
-    while True:
-        # Test di primalità per numeri dispari
-        # Controllo binario con divisori dispari
-        d = 3
-        primo = True
-        while d * d <= n:
-            if n % d == 0:
-                primo = False
-                code_db.add(binary_code(n))
+    # Con gmpy2 la ricerca è una singola chiamata in C
+    if gmpy2 is not None:
+        return int(gmpy2.next_prime(n - 1))
+
+    # Test di primalità (Miller-Rabin) solo sui residui della ruota
+    for c in wheel_candidates(n):
+        if is_prime(c):
+            return c
+
+# Crivello segmentato: ogni segmento contiene segment_size numeri dispari, un byte
+# ciascuno. SEGMENT_SIZE (32 KiB, la cache L1) è il minimo e il valore di riserva
+SEGMENT_SIZE = 1 << 15
+# In Python ogni segmento costa un ciclo interpretato su tutti i primi base: conviene
+# il segmento più grande che resta nella cache L2 (da 10^11, 2 MiB ≈ 2× più veloce
+# di 32 KiB), fino a questo limite
+MAX_SEGMENT_SIZE = 1 << 21
+
+def cpu_cache_size(level: int):
+    """Dimensione in byte della cache dati di livello level, None se non rilevabile."""
+    name = 'SC_LEVEL1_DCACHE_SIZE' if level == 1 else f'SC_LEVEL{level}_CACHE_SIZE'
+    try:
+        size = os.sysconf(name)
+        if size > 0:
+            return size
+    except (ValueError, OSError, AttributeError):
+        pass
+    # Linux senza la voce in sysconf: le stesse informazioni sono in sysfs
+    for index in sorted(Path('/sys/devices/system/cpu/cpu0/cache').glob('index*')):
+        try:
+            if int((index / 'level').read_text()) != level:
+                continue
+            if (index / 'type').read_text().strip() == 'Instruction':
+                continue
+            size = (index / 'size').read_text().strip()  # es. "48K"
+            return int(size.rstrip('KM')) << {'K': 10, 'M': 20}.get(size[-1], 0)
+        except (OSError, ValueError):
+            continue
+    return None
+
+def default_segment_size() -> int:
+    """Segmento dimensionato sulla cache L2, tra SEGMENT_SIZE e MAX_SEGMENT_SIZE."""
+    return max(SEGMENT_SIZE, min(cpu_cache_size(2) or SEGMENT_SIZE, MAX_SEGMENT_SIZE))
+
+# Oltre √n = 2^22 (n ≈ 1.7·10^13) tabella dei primi base e preparazione iniziale
+# costano più del test Miller-Rabin sui soli candidati: si passa a next_prime_binary
+MAX_SIEVE_BASE = 1 << 22
+
+# Pre-crivello sui soli dispari: nel periodo 3·5·7·11·13·17 = 255255 la posizione t
+# vale 1 se 2t+1 è coprimo con questi primi. I segmenti partono da una copia di
+# questo schema al posto di tutti 1, così i loro multipli non vanno mai cancellati
+PRESIEVE_PRIMES = (3, 5, 7, 11, 13, 17)
+PRESIEVE_PERIOD = prod(PRESIEVE_PRIMES)
+
+def _presieve_pattern() -> bytes:
+    pattern = bytearray(b"\x01") * PRESIEVE_PERIOD
+    for p in PRESIEVE_PRIMES:
+        # 2t+1 è multiplo di p per t ≡ (p-1)/2 (mod p)
+        pattern[p // 2::p] = bytes(len(range(p // 2, PRESIEVE_PERIOD, p)))
+    return bytes(pattern)
+
+PRESIEVE_PATTERN = _presieve_pattern()
+
+def presieved_segment(lo: int, segment_size: int) -> bytearray:
+    """
+    Segmento di segment_size dispari da lo (dispari) inizializzato dallo schema del
+    pre-crivello: i multipli di 3..17 sono già a 0, i primi 3..17 restano a 1.
+    """
+    t0 = (lo // 2) % PRESIEVE_PERIOD
+    reps = (t0 + segment_size - 1) // PRESIEVE_PERIOD + 1
+    pattern = memoryview(PRESIEVE_PATTERN * reps if reps > 1 else PRESIEVE_PATTERN)
+    seg = bytearray(pattern[t0:t0 + segment_size])
+    for p in PRESIEVE_PRIMES:
+        if lo <= p < lo + 2 * segment_size:
+            seg[(p - lo) // 2] = 1
+    return seg
+
+def simple_sieve(limit: int) -> list:
+    """Primi dispari <= limit con il crivello di Eratostene (solo dispari)."""
+    if limit < 3:
+        return []
+    # L'indice i rappresenta il numero dispari 2i+1
+    sieve = bytearray([1]) * (limit // 2 + 1)
+    sieve[0] = 0
+    for i in range(1, (isqrt(limit) - 1) // 2 + 1):
+        if sieve[i]:
+            p = 2 * i + 1
+            first = p * p // 2
+            sieve[first::p] = bytes(len(range(first, len(sieve), p)))
+    return list(compress(range(1, limit + 1, 2), sieve))
+
+def sieve_segment(lo: int, segment_size: int, base_primes: list,
+                  zeros=None) -> bytearray:
+    """
+    Crivella un segmento di segment_size dispari a partire da lo (dispari).
+    Restituisce un bytearray con 1 nelle posizioni dei primi: funzione pura,
+    senza stato condiviso, riutilizzabile anche da un pool di processi.
+    """
+    if zeros is None:
+        zeros = memoryview(bytes(segment_size))
+    hi = lo + 2 * segment_size
+    seg = presieved_segment(lo, segment_size)
+    for p in base_primes:
+        if p * p >= hi:
+            break
+        if p <= PRESIEVE_PRIMES[-1]:
+            continue  # Multipli di 3..17 già esclusi dallo schema del pre-crivello
+        # Primo multiplo dispari di p nel segmento (mai p stesso)
+        m = max(p * p, (lo + p - 1) // p * p)
+        if m % 2 == 0:
+            m += p
+        j = (m - lo) // 2
+        if j < segment_size:
+            seg[j::p] = zeros[:(segment_size - 1 - j) // p + 1]
+    return seg
+
+def segmented_prime_iter(start: int = 2, segment_size: int = SEGMENT_SIZE,
+                         stop: int = None):
+    """Genera in ordine crescente tutti i primi >= start (e < stop, se indicato)."""
+    if start <= 2:
+        if stop is not None and stop <= 2:
+            return
+        yield 2
+        start = 3
+    lo = start | 1  # Primo dispari >= start
+    base_primes = []
+    base_limit = 1
+    active = 0  # Primi base già in uso (p² < hi)
+    # Primi piccoli (più colpi per segmento): indice del prossimo multiplo,
+    # conservato tra un segmento e l'altro invece di ricalcolarlo con divisioni
+    small_primes = []
+    offsets = []
+    # Primi grandi (al più un colpo per segmento): secchi indicizzati per segmento
+    buckets = {}
+    seg_no = 0
+    # Buffer precalcolati: inizializzazione e cancellazione sono copie in C
+    pattern = memoryview(PRESIEVE_PATTERN * (segment_size // PRESIEVE_PERIOD + 2))
+    zeros = memoryview(bytes(segment_size))
+
+    while stop is None or lo < stop:
+        # Il segmento copre i dispari lo, lo+2, ..., hi-2
+        hi = lo + 2 * segment_size
+
+        # Estende i primi base fino a √hi quando necessario
+        root = isqrt(hi)
+        if root > MAX_SIEVE_BASE:
+            break
+        if root > base_limit:
+            base_limit = max(root, 2 * base_limit)
+            base_primes = simple_sieve(base_limit)
+
+        # Attiva i primi base con p² < hi: primo multiplo dispari >= lo (mai p stesso)
+        while active < len(base_primes) and base_primes[active] ** 2 < hi:
+            p = base_primes[active]
+            active += 1
+            if p <= PRESIEVE_PRIMES[-1]:
+                continue  # Già esclusi dallo schema del pre-crivello
+            m = max(p * p, (lo + p - 1) // p * p)
+            if m % 2 == 0:
+                m += p
+            j = (m - lo) // 2
+            if p < segment_size:
+                small_primes.append(p)
+                offsets.append(j)
+            else:
+                q, j = divmod(j, segment_size)
+                buckets.setdefault(seg_no + q, []).append((p, j))
+
+        t0 = (lo // 2) % PRESIEVE_PERIOD
+        seg = bytearray(pattern[t0:t0 + segment_size])
+        # Lo schema cancella anche i primi stessi: si ripristinano se sono nel segmento
+        for p in PRESIEVE_PRIMES:
+            if lo <= p < hi:
+                seg[(p - lo) // 2] = 1
+        # Per i primi piccoli (p < segment_size) il prossimo multiplo cade sempre nel
+        # segmento: la cancellazione è un'unica scrittura a passo p eseguita in C
+        for i, p in enumerate(small_primes):
+            j = offsets[i]
+            seg[j::p] = zeros[:(segment_size - 1 - j) // p + 1]
+            offsets[i] = (j - segment_size) % p
+        for p, j in buckets.pop(seg_no, ()):
+            seg[j] = 0
+            q, j = divmod(j + p, segment_size)
+            buckets.setdefault(seg_no + q, []).append((p, j))
+
+        # Estrazione dei primi superstiti senza cicli Python sugli indici
+        yield from compress(range(lo, hi if stop is None else min(hi, stop), 2), seg)
+        lo = hi
+        seg_no += 1
+
+    # Numeri troppo grandi per il crivello: Miller-Rabin candidato per candidato
+    n = lo
+    while stop is None or n < stop:
+        p = next_prime_binary(n)
+        if stop is not None and p >= stop:
+            return
+        yield p
+        n = p + 1
+
+# Dispari per blocco di lavoro a regime (almeno un segmento): abbastanza da
+# ammortizzare la preparazione dei primi base in ogni processo e il trasferimento
+# dei risultati
+BLOCK_SIZE = 1 << 23
+# Dispari del primo blocco: il primo risultato arriva dopo poco lavoro
+FIRST_BLOCK_SIZE = 1 << 18
+
+def _init_worker():
+    """Le interruzioni sono gestite solo dal processo principale."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+def _sieve_block(lo: int, hi: int, segment_size: int) -> array:
+    """Primi in [lo, hi) impaccati come uint64: unità di lavoro dei processi."""
+    return array('Q', segmented_prime_iter(lo, segment_size, hi))
+
+def parallel_prime_iter(start: int = 2, segment_size: int = SEGMENT_SIZE,
+                        workers: int = None):
+    """
+    Come segmented_prime_iter, ma i blocchi di segmenti sono crivellati in
+    parallelo da un pool di processi e restituiti nell'ordine originale.
+    """
+    workers = workers or os.cpu_count() or 1
+    # I blocchi partono piccoli e raddoppiano a ogni giro di processi fino a
+    # BLOCK_SIZE dispari: chi chiede pochi primi non fa crivellare milioni di numeri.
+    # Ogni blocco ricalcola i primi base fino alla sua radice, quindi il primo ha
+    # almeno 2√start dispari per ammortizzarli
+    limit = MAX_SIEVE_BASE * MAX_SIEVE_BASE
+    lo = max(start, 2)
+    max_block = 2 * segment_size * max(1, BLOCK_SIZE // segment_size)
+    block = min(2 * max(FIRST_BLOCK_SIZE, 2 * isqrt(lo)), max_block)
+    submitted = 0
+    # Blocchi in corso, nell'ordine di consegna: il pool assegna il prossimo
+    # blocco al primo processo libero, la coda ne ripristina l'ordine
+    pending = deque()
+    pool = ProcessPoolExecutor(workers, initializer=_init_worker)
+    try:
+        while True:
+            # Invio pigro: un blocco nuovo solo dopo averne consegnato uno
+            while lo < limit and len(pending) <= workers:
+                hi = min(lo + block, limit)
+                pending.append(pool.submit(_sieve_block, lo, hi,
+                                            min(segment_size, block // 2)))
+                lo = hi
+                submitted += 1
+                if submitted % workers == 0:
+                    block = min(2 * block, max_block)
+            if not pending:
                 break
-            d += 2
-        if primo:
-            return n
-        n += 2  # Salta ai prossimi dispari
+            yield from pending.popleft().result()
+    finally:
+        # Interruzione anticipata: i blocchi non ancora avviati si annullano e
+        # non si attende la fine di quelli in corso
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False)
+    # Oltre il limite del crivello si prosegue con Miller-Rabin
+    yield from segmented_prime_iter(lo, segment_size)
 
-def infinite_prime_engine(start: int = 1):
+def infinite_prime_engine(start: int = 1, batch_size: int = 1024):
     """Motore binario infinito con pₙ e dₙ."""
-    n = start
     last_prime = None
-    count = 0
-    while True:
-        p = next_prime_binary(n)
-        count += 1
-        if last_prime is None:
-            gap = 0
-        else:
-            gap = p - last_prime
-        print(f"p{count} = {p} | gap dₙ = {gap} | bin: {binary_code(p)}")
-        last_prime = p
-        n = p + 1
+    # Le righe vengono scritte a blocchi per ridurre le chiamate a write
+    buffer = []
+    # Larghezza corrente dei codici: i primi crescono, si ricalcola solo oltre 2^bits
+    bits, bits_limit = 8, 0
+    try:
+        primes = segmented_prime_iter(start, default_segment_size())
+        for count, p in enumerate(primes, 1):
+            if last_prime is None:
+                gap = 0
+            else:
+                gap = p - last_prime
+            if p >= bits_limit:
+                bits = len(binary_code(p))
+                bits_limit = 1 << bits
+            code = binary_code(p, bits)
+            buffer.append(f"p{count} = {p} | gap dₙ = {gap} | bin: {code}")
+            if len(buffer) >= batch_size:
+                sys.stdout.write("\n".join(buffer) + "\n")
+                buffer.clear()
+            last_prime = p
+    finally:
+        # Scrive le righe rimaste (anche dopo Ctrl+C)
+        if buffer:
+            sys.stdout.write("\n".join(buffer) + "\n")
 
 if __name__ == "__main__":
     print("=== Binary Prime Engine INFINITA & BINARIA con pₙ e dₙ ===")
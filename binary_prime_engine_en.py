@@ -9,21 +9,25 @@ Features:
 - Adaptive binary representation (auto-expanding bits)
 - Gap tracking between consecutive primes (dₙ)
 - Compact binary representation of numbers
-- Persistent storage of binary codes for known composite numbers
 - Optimized prime checking using binary patterns
 """
 
-import json
+import os
+import signal
+import sys
+from array import array
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import compress
+from math import gcd, isqrt, prod
 from pathlib import Path
+from typing import Tuple
 
-DB_FILE = Path("binary_codes.json")
-
-# Load known binary codes database
-if DB_FILE.exists():
-    with open(DB_FILE, "r") as f:
-        code_db = set(json.load(f))
-else:
-    code_db = set()
+try:
+    import gmpy2
+except ImportError:  # gmpy2 is optional: fall back to pure-Python Miller-Rabin
+    gmpy2 = None
 
 def binary_code(n: int, bits: int = None) -> str:
     """
@@ -36,79 +40,500 @@ def binary_code(n: int, bits: int = None) -> str:
             return "0"
         bits = n.bit_length()
         # Round to multiples of 4 for readability (nibble)
-        bits = ((bits + 3) // 4) * 4
+        bits = (bits + 3) & ~3
         # Minimum 8 bits for small numbers
-        bits = max(bits, 8)
+        if bits < 8:
+            bits = 8
     
-    return format(n, f'0{bits}b')
+    # zfill is only valid for n >= 0: for negatives format puts the sign first
+    if n < 0:
+        return format(n, f'0{bits}b')
+    return bin(n)[2:].zfill(bits)
+
+def binary_code_ends(n: int, k: int = 20) -> Tuple[str, str, int]:
+    """
+    First and last k digits of binary_code(n) and its length, without building
+    the full string: for numbers of thousands of bits two shifts are enough.
+    """
+    if n == 0:
+        return "0", "0", 1
+    bits = max(8, (n.bit_length() + 3) & ~3)  # Same width as binary_code(n)
+    if n < 0:
+        # Negatives as format(n, f'0{bits}b'): the sign takes one position of
+        # the width
+        m = -n
+        width = max(bits - 1, m.bit_length())
+        if width < k:
+            code = format(n, f"0{bits}b")
+            return code, code, len(code)
+        head = ("-" + format(m >> (width - k + 1), f"0{k - 1}b"))[:k]
+        tail = format(m & ((1 << k) - 1), f"0{k}b")
+        return head, tail, width + 1
+    if bits <= k:
+        code = bin(n)[2:].zfill(bits)
+        return code, code, bits
+    return format(n >> (bits - k), f"0{k}b"), format(n & ((1 << k) - 1), f"0{k}b"), bits
+
+# Small primes used as a filter and as Miller-Rabin witnesses:
+# with the first 13 primes the test is deterministic for n < 3.3·10^24
+SMALL_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+MR_WITNESSES = SMALL_PRIMES
+# For n < 2^64 Sinclair's 7 witnesses suffice: almost half the exponentiations
+MR_WITNESSES_64 = (2, 325, 9375, 28178, 450775, 9780504, 1795265022)
+
+# Product of the primes 43..1021: a single C-level gcd replaces ~160 divisions
+SCREEN_PRIMES = tuple(p for p in range(43, 1024, 2) if all(p % q for q in SMALL_PRIMES))
+SCREEN_PRODUCT = prod(SCREEN_PRIMES)
+SCREEN_BOUND = 1031 * 1031  # Below the square of the next prime the screen is enough
+# Primorial 2·3·…·41: one gcd rejects multiples of the small primes instead of
+# 13 divisions
+SMALL_PRIMORIAL = prod(SMALL_PRIMES)
+
+# Beyond this bound the 13 bases are no longer proven deterministic: BPSW
+# (base-2 Miller-Rabin + strong Lucas), with no known counterexample
+MR_BOUND = 3317044064679887385961981
+
+def _jacobi(a: int, n: int) -> int:
+    """Jacobi symbol (a/n) for odd positive n."""
+    a %= n
+    result = 1
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+def _strong_lucas_prp(n: int) -> bool:
+    """Strong Lucas probable-prime test, Selfridge parameters (method A), odd n > 41."""
+    # For a perfect square no D has (D/n) = -1
+    if isqrt(n) ** 2 == n:
+        return False
+    # First D in 5, -7, 9, -11, ... with (D/n) = -1; P = 1, Q = (1 - D) / 4
+    D = 5
+    while True:
+        j = _jacobi(D, n)
+        if j == -1:
+            break
+        if j == 0 and abs(D) != n:
+            return False
+        D = -D - 2 if D > 0 else -D + 2
+    Q = (1 - D) // 4
+
+    # n+1 = d·2^s with d odd
+    d = n + 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+
+    # U_d, V_d and Q^d mod n over the bits of d (P = 1)
+    U, V, Qk = 1, 1, Q % n
+    for bit in bin(d)[3:]:
+        U, V = U * V % n, (V * V - 2 * Qk) % n
+        Qk = Qk * Qk % n
+        if bit == "1":
+            U, V = U + V, D * U + V
+            # Halving modulo n (odd): add n to odd values first
+            U = (U + n if U & 1 else U) // 2 % n
+            V = (V + n if V & 1 else V) // 2 % n
+            Qk = Qk * Q % n
+
+    if U == 0 or V == 0:
+        return True
+    for _ in range(s - 1):
+        V = (V * V - 2 * Qk) % n
+        Qk = Qk * Qk % n
+        if V == 0:
+            return True
+    return False
+
+def is_prime_mr(n: int) -> bool:
+    """
+    Deterministic primality test: 7-base Miller-Rabin below 2^64, 13 bases up to
+    3.3·10^24, BPSW beyond.
+    """
+    if n < 2:
+        return False
+    if gcd(n, SMALL_PRIMORIAL) != 1:
+        return n in SMALL_PRIMES
+    # No divisor <= 41: below 43² the number is prime without further tests
+    if n < 43 * 43:
+        return True
+    if gcd(n, SCREEN_PRODUCT) != 1:
+        return False
+    if n < SCREEN_BOUND:
+        return True
+
+    # Write n-1 = d·2^s with d odd
+    d = n - 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+
+    # Beyond MR_BOUND: BPSW, a single base (2) followed by the strong Lucas test
+    if n < 1 << 64:
+        witnesses = MR_WITNESSES_64
+    elif n < MR_BOUND:
+        witnesses = MR_WITNESSES
+    else:
+        witnesses = (2,)
+    for a in witnesses:
+        a %= n
+        if a == 0:
+            continue
+        # Three-argument pow stays in C: a Montgomery reduction written in Python
+        # is slower at every size (8x at 64 bits, 2x at 512 bits)
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return n < MR_BOUND or _strong_lucas_prp(n)
+
+if gmpy2 is not None:
+    def is_prime(n: int) -> bool:
+        """Primality test in C via GMP (BPSW, exact for n < 2^64)."""
+        return bool(gmpy2.is_prime(n))
+else:
+    is_prime = is_prime_mr
+
+# 2·3·5·7·11 = 2310 wheel: only the 480 coprime residues are prime candidates
+WHEEL_MODULUS = 2 * 3 * 5 * 7 * 11
+WHEEL = tuple(k for k in range(WHEEL_MODULUS) if gcd(k, WHEEL_MODULUS) == 1)
+WHEEL_GAPS = tuple(
+    b - a for a, b in zip(WHEEL, WHEEL[1:] + (WHEEL[0] + WHEEL_MODULUS,))
+)
+
+def wheel_candidates(n: int):
+    """Yield, in order, the candidates >= n coprime to 2, 3, 5, 7, 11."""
+    base = n - n % WHEEL_MODULUS
+    i = bisect_left(WHEEL, n % WHEEL_MODULUS)
+    size = len(WHEEL_GAPS)
+    c = base + WHEEL[i]
+    while True:
+        yield c
+        c += WHEEL_GAPS[i]
+        i += 1
+        if i == size:
+            i = 0
 
 def next_prime_binary(n: int) -> int:
     """Find the next binary prime using patterns and predictive gaps."""
-    # Force n to be odd
+    # Base cases
     if n < 2:
         return 2
     if n == 2:
         return 3
-    if n % 2 == 0:
-        n += 1
+    # The wheel primes themselves are handled separately
+    for p in (3, 5, 7, 11):
+        if n <= p:
+            return p
 
-    while True:
-        # Primality test for odd numbers
-        # Binary check with odd divisors
-        d = 3
-        is_prime = True
-        while d * d <= n:
-            if n % d == 0:
-                is_prime = False
-                code_db.add(binary_code(n))
-                break
-            d += 2
-        if is_prime:
-            return n
-        n += 2  # Skip to next odd numbers
+    # With gmpy2 the search is a single C call
+    if gmpy2 is not None:
+        return int(gmpy2.next_prime(n - 1))
 
-def infinite_prime_engine(start: int = 1):
-    """Infinite binary engine with pₙ and dₙ."""
-    n = start
-    last_prime = None
-    count = 0
-    while True:
+    # Primality test (Miller-Rabin) only on wheel residues
+    for c in wheel_candidates(n):
+        if is_prime(c):
+            return c
+
+# Segmented sieve: each segment holds segment_size odd numbers, one byte
+# each. SEGMENT_SIZE (32 KiB, the L1 cache) is the minimum and the fallback
+SEGMENT_SIZE = 1 << 15
+# In Python every segment costs an interpreted loop over all base primes: the
+# largest segment that stays in L2 cache pays off (from 10^11, 2 MiB is ≈ 2×
+# faster than 32 KiB), up to this limit
+MAX_SEGMENT_SIZE = 1 << 21
+
+def cpu_cache_size(level: int):
+    """Size in bytes of the level-th data cache, None if it cannot be detected."""
+    name = 'SC_LEVEL1_DCACHE_SIZE' if level == 1 else f'SC_LEVEL{level}_CACHE_SIZE'
+    try:
+        size = os.sysconf(name)
+        if size > 0:
+            return size
+    except (ValueError, OSError, AttributeError):
+        pass
+    # Linux without the sysconf entry: the same information is in sysfs
+    for index in sorted(Path('/sys/devices/system/cpu/cpu0/cache').glob('index*')):
+        try:
+            if int((index / 'level').read_text()) != level:
+                continue
+            if (index / 'type').read_text().strip() == 'Instruction':
+                continue
+            size = (index / 'size').read_text().strip()  # e.g. "48K"
+            return int(size.rstrip('KM')) << {'K': 10, 'M': 20}.get(size[-1], 0)
+        except (OSError, ValueError):
+            continue
+    return None
+
+def default_segment_size() -> int:
+    """Segment sized to the L2 cache, between SEGMENT_SIZE and MAX_SEGMENT_SIZE."""
+    return max(SEGMENT_SIZE, min(cpu_cache_size(2) or SEGMENT_SIZE, MAX_SEGMENT_SIZE))
+
+# Beyond √n = 2^22 (n ≈ 1.7·10^13) the base prime table and the initial setup
+# cost more than Miller-Rabin on the candidates alone: switch to next_prime_binary
+MAX_SIEVE_BASE = 1 << 22
+
+# Pre-sieve over odd numbers only: within the period 3·5·7·11·13·17 = 255255,
+# slot t is 1 when 2t+1 is coprime to these primes. Segments start from a copy
+# of this pattern instead of all ones, so their multiples never need to be struck
+PRESIEVE_PRIMES = (3, 5, 7, 11, 13, 17)
+PRESIEVE_PERIOD = prod(PRESIEVE_PRIMES)
+
+def _presieve_pattern() -> bytes:
+    pattern = bytearray(b"\x01") * PRESIEVE_PERIOD
+    for p in PRESIEVE_PRIMES:
+        # 2t+1 is a multiple of p for t ≡ (p-1)/2 (mod p)
+        pattern[p // 2::p] = bytes(len(range(p // 2, PRESIEVE_PERIOD, p)))
+    return bytes(pattern)
+
+PRESIEVE_PATTERN = _presieve_pattern()
+
+def presieved_segment(lo: int, segment_size: int) -> bytearray:
+    """
+    Segment of segment_size odd numbers from lo (odd) initialised from the
+    pre-sieve pattern: multiples of 3..17 are already 0, the primes 3..17 stay 1.
+    """
+    t0 = (lo // 2) % PRESIEVE_PERIOD
+    reps = (t0 + segment_size - 1) // PRESIEVE_PERIOD + 1
+    pattern = memoryview(PRESIEVE_PATTERN * reps if reps > 1 else PRESIEVE_PATTERN)
+    seg = bytearray(pattern[t0:t0 + segment_size])
+    for p in PRESIEVE_PRIMES:
+        if lo <= p < lo + 2 * segment_size:
+            seg[(p - lo) // 2] = 1
+    return seg
+
+def simple_sieve(limit: int) -> list:
+    """Odd primes <= limit using the sieve of Eratosthenes (odd only)."""
+    if limit < 3:
+        return []
+    # Index i represents the odd number 2i+1
+    sieve = bytearray([1]) * (limit // 2 + 1)
+    sieve[0] = 0
+    for i in range(1, (isqrt(limit) - 1) // 2 + 1):
+        if sieve[i]:
+            p = 2 * i + 1
+            first = p * p // 2
+            sieve[first::p] = bytes(len(range(first, len(sieve), p)))
+    return list(compress(range(1, limit + 1, 2), sieve))
+
+def sieve_segment(lo: int, segment_size: int, base_primes: list,
+                  zeros=None) -> bytearray:
+    """
+    Sieve a segment of segment_size odd numbers starting at lo (odd).
+    Returns a bytearray with 1 at the positions of the primes: a pure
+    function with no shared state, reusable from a process pool as well.
+    """
+    if zeros is None:
+        zeros = memoryview(bytes(segment_size))
+    hi = lo + 2 * segment_size
+    seg = presieved_segment(lo, segment_size)
+    for p in base_primes:
+        if p * p >= hi:
+            break
+        if p <= PRESIEVE_PRIMES[-1]:
+            continue  # Multiples of 3..17 are already cleared by the pre-sieve pattern
+        # First odd multiple of p inside the segment (never p itself)
+        m = max(p * p, (lo + p - 1) // p * p)
+        if m % 2 == 0:
+            m += p
+        j = (m - lo) // 2
+        if j < segment_size:
+            seg[j::p] = zeros[:(segment_size - 1 - j) // p + 1]
+    return seg
+
+def segmented_prime_iter(start: int = 2, segment_size: int = SEGMENT_SIZE,
+                         stop: int = None):
+    """Yield all primes >= start (and < stop, if given) in ascending order."""
+    if start <= 2:
+        if stop is not None and stop <= 2:
+            return
+        yield 2
+        start = 3
+    lo = start | 1  # First odd number >= start
+    base_primes = []
+    base_limit = 1
+    active = 0  # Base primes already in use (p² < hi)
+    # Small primes (several hits per segment): index of the next multiple,
+    # carried over between segments instead of being recomputed by division
+    small_primes = []
+    offsets = []
+    # Large primes (at most one hit per segment): buckets keyed by segment
+    buckets = {}
+    seg_no = 0
+    # Precomputed buffers: initialisation and striking are C-level copies
+    pattern = memoryview(PRESIEVE_PATTERN * (segment_size // PRESIEVE_PERIOD + 2))
+    zeros = memoryview(bytes(segment_size))
+
+    while stop is None or lo < stop:
+        # The segment covers the odd numbers lo, lo+2, ..., hi-2
+        hi = lo + 2 * segment_size
+
+        # Extend the base primes up to √hi when needed
+        root = isqrt(hi)
+        if root > MAX_SIEVE_BASE:
+            break
+        if root > base_limit:
+            base_limit = max(root, 2 * base_limit)
+            base_primes = simple_sieve(base_limit)
+
+        # Activate base primes with p² < hi: first odd multiple >= lo (never p itself)
+        while active < len(base_primes) and base_primes[active] ** 2 < hi:
+            p = base_primes[active]
+            active += 1
+            if p <= PRESIEVE_PRIMES[-1]:
+                continue  # Already excluded by the pre-sieve pattern
+            m = max(p * p, (lo + p - 1) // p * p)
+            if m % 2 == 0:
+                m += p
+            j = (m - lo) // 2
+            if p < segment_size:
+                small_primes.append(p)
+                offsets.append(j)
+            else:
+                q, j = divmod(j, segment_size)
+                buckets.setdefault(seg_no + q, []).append((p, j))
+
+        t0 = (lo // 2) % PRESIEVE_PERIOD
+        seg = bytearray(pattern[t0:t0 + segment_size])
+        # The pattern also clears these primes: restore any that fall in the segment
+        for p in PRESIEVE_PRIMES:
+            if lo <= p < hi:
+                seg[(p - lo) // 2] = 1
+        # For small primes (p < segment_size) the next multiple always falls inside
+        # the segment: striking is a single stride-p store executed in C
+        for i, p in enumerate(small_primes):
+            j = offsets[i]
+            seg[j::p] = zeros[:(segment_size - 1 - j) // p + 1]
+            offsets[i] = (j - segment_size) % p
+        for p, j in buckets.pop(seg_no, ()):
+            seg[j] = 0
+            q, j = divmod(j + p, segment_size)
+            buckets.setdefault(seg_no + q, []).append((p, j))
+
+        # Extract the surviving primes without Python-level index loops
+        yield from compress(range(lo, hi if stop is None else min(hi, stop), 2), seg)
+        lo = hi
+        seg_no += 1
+
+    # Numbers too large for the sieve: Miller-Rabin candidate by candidate
+    n = lo
+    while stop is None or n < stop:
         p = next_prime_binary(n)
-        count += 1
-        if last_prime is None:
-            gap = 0
-        else:
-            gap = p - last_prime
-        print(f"p{count} = {p} | gap dₙ = {gap} | bin: {binary_code(p)}")
-        last_prime = p
+        if stop is not None and p >= stop:
+            return
+        yield p
         n = p + 1
 
-def save_database():
-    """Save the binary codes database."""
+# Odd numbers per work block at full size (at least one segment): enough to
+# amortise setting up the base primes in each process and transferring the results
+BLOCK_SIZE = 1 << 23
+# Odd numbers in the first block: the first result arrives after little work
+FIRST_BLOCK_SIZE = 1 << 18
+
+def _init_worker():
+    """Interruptions are handled by the main process only."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+def _sieve_block(lo: int, hi: int, segment_size: int) -> array:
+    """Primes in [lo, hi) packed as uint64: the unit of work for the processes."""
+    return array('Q', segmented_prime_iter(lo, segment_size, hi))
+
+def parallel_prime_iter(start: int = 2, segment_size: int = SEGMENT_SIZE,
+                        workers: int = None):
+    """
+    Like segmented_prime_iter, but blocks of segments are sieved in parallel
+    by a process pool and yielded back in their original order.
+    """
+    workers = workers or os.cpu_count() or 1
+    # Blocks start small and double every round of processes up to BLOCK_SIZE
+    # odd numbers: asking for a few primes does not sieve millions of numbers.
+    # Each block recomputes the base primes up to its root, so the first one has
+    # at least 2√start odd numbers to amortise them
+    limit = MAX_SIEVE_BASE * MAX_SIEVE_BASE
+    lo = max(start, 2)
+    max_block = 2 * segment_size * max(1, BLOCK_SIZE // segment_size)
+    block = min(2 * max(FIRST_BLOCK_SIZE, 2 * isqrt(lo)), max_block)
+    submitted = 0
+    # Blocks in flight, in delivery order: the pool hands the next block to
+    # the first idle process, the queue restores the order
+    pending = deque()
+    pool = ProcessPoolExecutor(workers, initializer=_init_worker)
     try:
-        with open(DB_FILE, "w") as f:
-            json.dump(list(code_db), f, indent=2)
-        print(f"\n💾 Database saved: {len(code_db)} binary codes")
-    except Exception as e:
-        print(f"❌ Error saving database: {e}")
+        while True:
+            # Lazy submission: a new block only after one has been delivered
+            while lo < limit and len(pending) <= workers:
+                hi = min(lo + block, limit)
+                pending.append(pool.submit(_sieve_block, lo, hi,
+                                            min(segment_size, block // 2)))
+                lo = hi
+                submitted += 1
+                if submitted % workers == 0:
+                    block = min(2 * block, max_block)
+            if not pending:
+                break
+            yield from pending.popleft().result()
+    finally:
+        # Early exit: blocks that have not started yet are cancelled and the
+        # running ones are not waited for
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=False)
+    # Past the sieve limit, continue with Miller-Rabin
+    yield from segmented_prime_iter(lo, segment_size)
+
+def infinite_prime_engine(start: int = 1, batch_size: int = 1024):
+    """Infinite binary engine with pₙ and dₙ."""
+    last_prime = None
+    # Lines are written in blocks to cut down on write calls
+    buffer = []
+    # Current code width: primes grow, so it is recomputed only past 2^bits
+    bits, bits_limit = 8, 0
+    try:
+        primes = segmented_prime_iter(start, default_segment_size())
+        for count, p in enumerate(primes, 1):
+            if last_prime is None:
+                gap = 0
+            else:
+                gap = p - last_prime
+            if p >= bits_limit:
+                bits = len(binary_code(p))
+                bits_limit = 1 << bits
+            code = binary_code(p, bits)
+            buffer.append(f"p{count} = {p} | gap dₙ = {gap} | bin: {code}")
+            if len(buffer) >= batch_size:
+                sys.stdout.write("\n".join(buffer) + "\n")
+                buffer.clear()
+            last_prime = p
+    finally:
+        # Write the remaining lines (also after Ctrl+C)
+        if buffer:
+            sys.stdout.write("\n".join(buffer) + "\n")
 
 if __name__ == "__main__":
     print("=== Binary Prime Engine - INFINITE & BINARY with pₙ and dₙ ===")
     print("🔢 Advanced prime number generation with binary pattern analysis")
-    print("📊 Features: gap tracking, adaptive binary codes, persistent storage")
+    print("📊 Features: gap tracking, adaptive binary codes")
     print("="*70)
     
     try:
         start = int(input("Enter starting number: "))
         print(f"\n🚀 Starting infinite prime generation from {start}...")
-        print("⚠️  Press Ctrl+C to stop and save database\n")
+        print("⚠️  Press Ctrl+C to stop\n")
         infinite_prime_engine(start)
     except KeyboardInterrupt:
         print("\n\n⏹️  Generation stopped by user.")
-        save_database()
         print("👋 Thank you for using Binary Prime Engine!")
     except ValueError:
         print("❌ Please enter a valid number")
     except Exception as e:
         print(f"❌ Unexpected error: {e}")
-        save_database()
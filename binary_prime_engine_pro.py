@@ -18,12 +18,15 @@ import argparse
 import signal
 import sys
 from pathlib import Path
-from typing import Iterator, Optional, Set, Tuple, Dict, Any
+from typing import Iterator, Optional, Tuple, Dict, Any
 from dataclasses import dataclass, asdict
 from contextlib import contextmanager
 import threading
-from collections import deque
-import math
+from collections import OrderedDict
+from array import array
+
+from binary_prime_engine import (default_segment_size, is_prime, parallel_prime_iter,
+                                 segmented_prime_iter, wheel_candidates)
 
 # Configurazione logging
 logging.basicConfig(
@@ -36,6 +39,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Righe di output accumulate prima di ogni write
+OUTPUT_BATCH = 1024
+
+# Buffer del file di output: più blocchi di righe per ogni chiamata di sistema
+OUTPUT_BUFFER = 1 << 20
+
+# Primi accumulati prima di aggiornare le statistiche
+STATS_BATCH = 1024
+
 @dataclass
 class PrimeStats:
     """Statistiche del motore di generazione primi."""
@@ -44,50 +56,69 @@ class PrimeStats:
     total_time: float = 0.0
     avg_gap: float = 0.0
     max_gap: int = 0
-    min_gap: int = float('inf')
+    min_gap: Optional[int] = None
     primes_per_second: float = 0.0
     cache_hits: int = 0
     cache_size: int = 0
 
 class PrimeCache:
-    """Cache LRU per ottimizzare la ricerca di primi."""
+    """Cache LRU suddiviso in shard; con thread_safe ogni shard ha il proprio lock."""
+    
+    NUM_SHARDS = 16
     
-    def __init__(self, max_size: int = 10000):
+    def __init__(self, max_size: int = 10000, thread_safe: bool = False):
         self.max_size = max_size
-        self.cache: Dict[int, bool] = {}
-        self.access_order = deque()
-        self.lock = threading.RLock()
+        # Capacità per shard: il totale resta circa max_size
+        self.shard_size = -(-max_size // self.NUM_SHARDS) if max_size > 0 else 0
+        # OrderedDict: spostamento e rimozione LRU in O(1), implementati in C
+        self.shards = [OrderedDict() for _ in range(self.NUM_SHARDS)]
+        # Il motore è single-thread: i lock (uno per shard, lock striping) servono
+        # solo se il cache è condiviso tra thread, e si scelgono una volta sola qui
+        self.locks = None
+        if thread_safe:
+            # Lock semplice e non RLock: get e put non si richiamano mai tenendo il lock
+            self.locks = [threading.Lock() for _ in range(self.NUM_SHARDS)]
+            self.get = self._get_locked
+            self.put = self._put_locked
+    
+    def _shard_index(self, n: int) -> int:
+        # I candidati sono dispari: si scarta il bit 0 per usare tutti gli shard
+        return (n >> 1) & (self.NUM_SHARDS - 1)
     
     def get(self, n: int) -> Optional[bool]:
         """Recupera dal cache se il numero è primo."""
-        with self.lock:
-            if n in self.cache:
-                # Sposta in coda (più recente)
-                self.access_order.remove(n)
-                self.access_order.append(n)
-                return self.cache[n]
-            return None
+        cache = self.shards[self._shard_index(n)]
+        value = cache.get(n)
+        if value is not None:
+            # Sposta in coda (più recente)
+            cache.move_to_end(n)
+        return value
     
     def put(self, n: int, is_prime: bool):
         """Aggiunge al cache."""
         # Se cache disabilitato, non fare nulla
         if self.max_size == 0:
             return
-            
-        with self.lock:
-            if n in self.cache:
-                self.access_order.remove(n)
-            elif len(self.cache) >= self.max_size:
-                # Rimuovi il meno usato
-                if self.access_order:  # Controlla che non sia vuoto
-                    oldest = self.access_order.popleft()
-                    del self.cache[oldest]
-            
-            self.cache[n] = is_prime
-            self.access_order.append(n)
+        
+        cache = self.shards[self._shard_index(n)]
+        if n in cache:
+            cache.move_to_end(n)
+        elif len(cache) >= self.shard_size:
+            # Rimuovi il meno usato
+            cache.popitem(last=False)
+        
+        cache[n] = is_prime
+    
+    def _get_locked(self, n: int) -> Optional[bool]:
+        with self.locks[self._shard_index(n)]:
+            return PrimeCache.get(self, n)
+    
+    def _put_locked(self, n: int, is_prime: bool):
+        with self.locks[self._shard_index(n)]:
+            PrimeCache.put(self, n, is_prime)
     
     def size(self) -> int:
-        return len(self.cache)
+        return sum(len(cache) for cache in self.shards)
 
 class BinaryPrimeEngine:
     """Motore binario per generazione primi - Versione Professionale."""
@@ -95,10 +126,25 @@ class BinaryPrimeEngine:
     def __init__(self, config: Dict[str, Any] = None):
         self.config = config or {}
         self.db_file = Path(self.config.get('db_file', 'binary_codes.json'))
-        self.cache = PrimeCache(self.config.get('cache_size', 10000))
+        # I codici sono salvati impaccati (uint64) in un file binario a parte
+        self.codes_file = self.db_file.with_suffix('.bin')
+        self.cache = PrimeCache(self.config.get('cache_size', 10000),
+                                self.config.get('thread_safe', False))
         self.stats = PrimeStats()
-        self.code_db: Set[str] = set()
+        # Codici impaccati come uint64: 8 byte ciascuno invece di un set di int Python
+        self.code_db = array('Q')
+        # Codici già scritti in coda al file binario (log append-only)
+        self._saved_codes = 0
+        self._codes_log = None
+        # Limite ai codici memorizzati: l'array non cresce più senza controllo
+        self.max_codes = self.config.get('max_codes', 100000)
+        # Raccolta dei codici dei composti: opzionale, disattivata di default
+        self.collect_codes = self.config.get('collect_composite_codes', False)
         self.running = True
+        # Gap in attesa di essere applicati alle statistiche
+        self._pending_gaps = []
+        # Orologio monotono: non risente delle correzioni dell'ora di sistema
+        self._start_time = time.monotonic()
         self.save_interval = self.config.get('save_interval', 1000)
         self.progress_interval = self.config.get('progress_interval', 100)
         
@@ -112,36 +158,73 @@ class BinaryPrimeEngine:
     def _load_database(self):
         """Carica il database dei codici binari."""
         try:
+            legacy = []
             if self.db_file.exists():
                 with open(self.db_file, "r") as f:
                     data = json.load(f)
                     if isinstance(data, list):
-                        self.code_db = set(data)
+                        legacy = [int(c, 2) for c in data]
                     else:
                         # Formato esteso con metadati
-                        self.code_db = set(data.get('codes', []))
+                        legacy = [int(c, 2) for c in data.get('codes', [])]
                         if 'stats' in data:
                             # Ripristina statistiche precedenti
                             for key, value in data['stats'].items():
                                 if hasattr(self.stats, key):
                                     setattr(self.stats, key, value)
+            if self.codes_file.exists():
+                with open(self.codes_file, "rb") as f:
+                    self.code_db.frombytes(f.read())
+            known = set(self.code_db)
+            # Compattazione: il log contiene doppioni, si riscrive una volta sola
+            if len(known) < len(self.code_db):
+                self.code_db = array('Q', sorted(known))
+                with open(self.codes_file, "wb") as f:
+                    self.code_db.tofile(f)
+            self._saved_codes = len(self.code_db)
+            # Codici del vecchio formato JSON: in coda al log al prossimo salvataggio
+            self.code_db.extend(n for n in dict.fromkeys(legacy)
+                                if n not in known and n < 1 << 64)
+            if self.code_db:
                 logger.info(f"Database caricato: {len(self.code_db)} codici")
         except Exception as e:
             logger.warning(f"Errore caricamento database: {e}")
-            self.code_db = set()
+            self.code_db = array('Q')
+            self._saved_codes = 0
+    
+    def _save_codes(self):
+        """Accoda al file binario i codici aggiunti dall'ultimo salvataggio."""
+        try:
+            # Solo i codici nuovi vanno in coda al log (8 byte ciascuno): il costo di
+            # ogni salvataggio non cresce più con la dimensione del database
+            if len(self.code_db) > self._saved_codes:
+                if self._codes_log is None:
+                    self._codes_log = open(self.codes_file, "ab")
+                self.code_db[self._saved_codes:].tofile(self._codes_log)
+                self._codes_log.flush()
+                self._saved_codes = len(self.code_db)
+        except Exception as e:
+            logger.error(f"Errore salvataggio database: {e}")
     
     def _save_database(self):
         """Salva il database dei codici binari con metadati."""
+        self._save_codes()
+        # Il log si riapre al prossimo salvataggio: nessun handle resta aperto
+        if self._codes_log is not None:
+            self._codes_log.close()
+            self._codes_log = None
         try:
+            # Il file JSON contiene solo metadati e statistiche
             data = {
-                'codes': list(self.code_db),
+                'codes_file': self.codes_file.name,
+                'num_codes': len(self.code_db),
                 'stats': asdict(self.stats),
                 'timestamp': time.time(),
-                'version': '2.0'
+                'version': '2.1'
             }
             
             with open(self.db_file, "w") as f:
-                json.dump(data, f, indent=2)
+                json.dump(data, f)
             logger.debug(f"Database salvato: {len(self.code_db)} codici")
         except Exception as e:
             logger.error(f"Errore salvataggio database: {e}")
@@ -150,9 +233,10 @@ class BinaryPrimeEngine:
         """Gestisce interruzione pulita."""
         logger.info("Interruzione ricevuta, salvando dati...")
         self.running = False
+        self._flush_stats()
         self._save_database()
-        self._print_final_stats()
-        sys.exit(0)
+        # Le statistiche le stampa main, dopo aver scritto le righe ancora nel buffer
+        raise KeyboardInterrupt
     
     def binary_code(self, n: int, bits: int = None) -> str:
         """
@@ -165,11 +249,15 @@ class BinaryPrimeEngine:
                 return "0"
             bits = n.bit_length()
             # Arrotonda a multipli di 4 per leggibilità (nibble)
-            bits = ((bits + 3) // 4) * 4
+            bits = (bits + 3) & ~3
             # Minimo 8 bit per numeri piccoli
-            bits = max(bits, 8)
+            if bits < 8:
+                bits = 8
         
-        return format(n, f'0{bits}b')
+        # zfill vale solo per n >= 0: per i negativi format mette davanti il segno
+        if n < 0:
+            return format(n, f'0{bits}b')
+        return bin(n)[2:].zfill(bits)
     
     def is_prime_optimized(self, n: int) -> bool:
         """Test di primalità ottimizzato con cache e pattern binari."""
@@ -186,34 +274,15 @@ class BinaryPrimeEngine:
             self.stats.cache_hits += 1
             return cached
         
-        # Pattern binario migliorato: escludi solo multipli ovvi
-        # Tutti i numeri dispari sono candidati validi
-        # Rimuoviamo il filtro troppo restrittivo sui 3 bit
-        
-        # Test divisibilità ottimizzato
-        limit = int(math.sqrt(n)) + 1
-        
-        # Test divisori piccoli comuni
-        small_primes = [3, 5, 7, 11, 13, 17, 19, 23, 29, 31]
-        for p in small_primes:
-            if p >= limit:
-                break
-            if n % p == 0:
-                self.cache.put(n, False)
-                self.code_db.add(self.binary_code(n))
-                return False
-        
-        # Test divisori restanti (solo dispari)
-        d = 37  # Inizia dopo i primi piccoli testati
-        while d < limit:
-            if n % d == 0:
-                self.cache.put(n, False)
-                self.code_db.add(self.binary_code(n))
-                return False
-            d += 2
-        
-        self.cache.put(n, True)
-        return True
+        # Test Miller-Rabin deterministico (sostituisce la trial division O(√n))
+        result = is_prime(n)
+        self.cache.put(n, result)
+        if (not result and self.collect_codes and n < 1 << 64
+                and len(self.code_db) < self.max_codes):
+            # Eventuali doppioni (dopo un'espulsione dalla cache) si compattano
+            # al caricamento
+            self.code_db.append(n)
+        return result
     
     def next_prime(self, n: int) -> int:
         """Trova il prossimo primo con ottimizzazioni."""
@@ -223,73 +292,115 @@ class BinaryPrimeEngine:
             return 2
         if n == 2:
             return 3
-        if n % 2 == 0:
-            n += 1
+        # I primi della ruota vanno gestiti a parte
+        for p in (3, 5, 7, 11):
+            if n <= p:
+                return p
         
+        # Solo i residui coprimi con 2·3·5·7·11: 480 candidati ogni 2310 numeri
+        candidates = wheel_candidates(n)
+        n = next(candidates)
         while not self.is_prime_optimized(n):
-            n += 2
+            n = next(candidates)
             self.stats.total_candidates += 1
         
         return n
     
+    def _prime_iterator(self, start: int) -> Iterator[int]:
+        """Primi >= start in ordine crescente, dal crivello segmentato."""
+        # Enumerazione densa: il crivello emette i primi senza testare i candidati;
+        # is_prime_optimized resta per le interrogazioni su singoli numeri
+        # Senza segment_kb il segmento si dimensiona sulla cache L2 rilevata
+        segment_kb = self.config.get('segment_kb')
+        segment_size = segment_kb * 1024 if segment_kb else default_segment_size()
+        # Con più processi i blocchi di segmenti si crivellano in parallelo
+        workers = self.config.get('workers', 1)
+        if workers > 1:
+            return parallel_prime_iter(start, segment_size, workers)
+        return segmented_prime_iter(start, segment_size)
+    
     def generate_primes(self, start: int = 1, limit: Optional[int] = None) -> Iterator[Tuple[int, int, int]]:
         """Generatore di primi con statistiche."""
-        start_time = time.time()
-        n = start
+        self._start_time = time.monotonic()
+        primes = self._prime_iterator(start)
+        # Riferimenti locali: evitano le ricerche di attributi su self nel ciclo
+        add_gap = self._pending_gaps.append
+        gaps = self._pending_gaps
+        apply_gaps = self._apply_gaps
+        flush_stats = self._flush_stats
+        save_codes = self._save_codes
+        save_interval = self.save_interval
+        progress_interval = self.progress_interval
         last_prime = None
         count = 0
         
         while self.running and (limit is None or count < limit):
-            p = self.next_prime(n)
+            p = next(primes)
             count += 1
             
             # Calcola gap
             gap = 0 if last_prime is None else p - last_prime
             
-            # Aggiorna statistiche
-            self._update_stats(gap, time.time() - start_time)
+            # Le statistiche si aggiornano a blocchi di STATS_BATCH primi;
+            # il tempo si campiona solo ai punti di salvataggio e di progresso
+            add_gap(gap)
+            if len(gaps) >= STATS_BATCH:
+                apply_gaps()
             
             yield count, p, gap
             
-            # Salvataggio periodico
-            if count % self.save_interval == 0:
-                self._save_database()
+            # Salvataggio periodico: solo i codici nuovi; i metadati JSON si
+            # scrivono una volta sola, alla chiusura
+            if count % save_interval == 0:
+                save_codes()
             
             # Progress logging
-            if count % self.progress_interval == 0:
+            if count % progress_interval == 0:
+                flush_stats()
                 self._log_progress(count, p)
             
             last_prime = p
-            n = p + 1
         
+        self._flush_stats()
         self._save_database()
     
-    def _update_stats(self, gap: int, elapsed: float):
-        """Aggiorna statistiche interne."""
-        self.stats.total_primes += 1
-        self.stats.total_time = elapsed
-        self.stats.cache_size = self.cache.size()
-        
-        if gap > 0:
-            self.stats.max_gap = max(self.stats.max_gap, gap)
-            self.stats.min_gap = min(self.stats.min_gap, gap)
-            
-            # Media mobile per gap
-            if self.stats.total_primes == 1:
-                self.stats.avg_gap = gap
-            else:
+    def _apply_gaps(self):
+        """Applica alle statistiche i gap accumulati dall'ultimo aggiornamento."""
+        stats = self.stats
+        gaps = self._pending_gaps
+        if gaps:
+            stats.total_primes += len(gaps)
+            positive = [g for g in gaps if g > 0]
+            if positive:
+                stats.max_gap = max(stats.max_gap, max(positive))
+                # None finché non si osserva il primo gap: niente confronti int/float
+                low = min(positive)
+                if stats.min_gap is None or low < stats.min_gap:
+                    stats.min_gap = low
+                
+                # Media mobile per gap
                 alpha = 0.1  # Fattore di smoothing
-                self.stats.avg_gap = (1 - alpha) * self.stats.avg_gap + alpha * gap
-        
+                avg = stats.avg_gap
+                for g in positive:
+                    avg = (1 - alpha) * avg + alpha * g
+                stats.avg_gap = avg
+            gaps.clear()
+    
+    def _flush_stats(self):
+        """Aggiorna tutte le statistiche, compresi tempo e velocità."""
+        self._apply_gaps()
+        stats = self.stats
+        elapsed = time.monotonic() - self._start_time
+        stats.total_time = elapsed
+        stats.cache_size = self.cache.size()
         if elapsed > 0:
-            self.stats.primes_per_second = self.stats.total_primes / elapsed
+            stats.primes_per_second = stats.total_primes / elapsed
     
     def _log_progress(self, count: int, prime: int):
         """Log periodico del progresso."""
         logger.info(
             f"Progress: {count} primi generati | "
             f"Ultimo: {prime} | "
-            f"Cache: {self.stats.cache_hits}/{self.cache.size()} | "
             f"Speed: {self.stats.primes_per_second:.2f} p/s"
         )
     
@@ -299,14 +410,18 @@ class BinaryPrimeEngine:
         print("STATISTICHE FINALI - BINARY PRIME ENGINE")
         print("="*60)
         print(f"Primi generati:        {self.stats.total_primes:,}")
-        print(f"Candidati testati:     {self.stats.total_candidates:,}")
         print(f"Tempo totale:          {self.stats.total_time:.2f}s")
         print(f"Primi per secondo:     {self.stats.primes_per_second:.2f}")
         print(f"Gap medio:             {self.stats.avg_gap:.2f}")
         print(f"Gap massimo:           {self.stats.max_gap}")
-        print(f"Gap minimo:            {self.stats.min_gap}")
-        print(f"Cache hits:            {self.stats.cache_hits:,}")
-        print(f"Cache size:            {self.stats.cache_size:,}")
+        print(f"Gap minimo:            {self.stats.min_gap or '-'}")
+        # Candidati e cache riguardano solo next_prime e is_prime_optimized: il
+        # crivello di generate_primes non li usa, quindi si mostrano solo se usati
+        if self.stats.total_candidates:
+            print(f"Candidati testati:     {self.stats.total_candidates:,}")
+        if self.stats.cache_size:
+            print(f"Cache hits:            {self.stats.cache_hits:,}")
+            print(f"Cache size:            {self.stats.cache_size:,}")
         print(f"Codici binari salvati: {len(self.code_db):,}")
         print("="*60)
 
@@ -361,6 +476,18 @@ Esempi d'uso:
         '--progress-interval', type=int, default=100,
         help='Intervallo progress log (default: 100)'
     )
+    parser.add_argument(
+        '--segment-size', type=int,
+        help='Segmento del crivello in KiB (default: dalla cache L2)'
+    )
+    parser.add_argument(
+        '--workers', '-w', type=int, default=1,
+        help='Processi per il crivello parallelo (default: 1)'
+    )
+    parser.add_argument(
+        '--no-binary', action='store_true',
+        help="Omette il codice binario dall'output (più veloce)"
+    )
     parser.add_argument(
         '--quiet', '-q', action='store_true',
         help='Modalità silenziosa (solo risultati)'
@@ -372,19 +499,42 @@ Esempi d'uso:
     
     return parser
 
+def _format_text(count: int, prime: int, gap: int, binary_code: str) -> str:
+    """Riga in formato testo."""
+    return f"p{count} = {prime} | gap dₙ = {gap} | bin: {binary_code}"
+
+def _format_csv(count: int, prime: int, gap: int, binary_code: str) -> str:
+    """Riga in formato CSV."""
+    return f"{count},{prime},{gap},{binary_code}"
+
+def _format_json(count: int, prime: int, gap: int, binary_code: str) -> str:
+    """Riga in formato JSON."""
+    # Solo interi e cifre binarie: niente da escapare, stesso testo di json.dumps
+    return (f'{{"count": {count}, "prime": {prime}, "gap": {gap}, '
+            f'"binary": "{binary_code}"}}')
+
+# Formattatore per tipo di output: la scelta si fa una volta sola, fuori dal ciclo
+FORMATTERS = {'text': _format_text, 'json': _format_json, 'csv': _format_csv}
+
+def _format_text_plain(count: int, prime: int, gap: int, binary_code: str) -> str:
+    """Riga in formato testo, senza codice binario."""
+    return f"p{count} = {prime} | gap dₙ = {gap}"
+
+def _format_csv_plain(count: int, prime: int, gap: int, binary_code: str) -> str:
+    """Riga in formato CSV, senza codice binario."""
+    return f"{count},{prime},{gap}"
+
+def _format_json_plain(count: int, prime: int, gap: int, binary_code: str) -> str:
+    """Riga in formato JSON, senza codice binario."""
+    return f'{{"count": {count}, "prime": {prime}, "gap": {gap}}}'
+
+# Varianti per --no-binary: il codice binario non viene nemmeno calcolato
+PLAIN_FORMATTERS = {'text': _format_text_plain, 'json': _format_json_plain,
+                    'csv': _format_csv_plain}
+
 def format_output(count: int, prime: int, gap: int, format_type: str, binary_code: str) -> str:
     """Formatta l'output secondo il tipo richiesto."""
-    if format_type == 'json':
-        return json.dumps({
-            'count': count,
-            'prime': prime,
-            'gap': gap,
-            'binary': binary_code
-        })
-    elif format_type == 'csv':
-        return f"{count},{prime},{gap},{binary_code}"
-    else:  # text
-        return f"p{count} = {prime} | gap dₙ = {gap} | bin: {binary_code}"
+    return FORMATTERS.get(format_type, _format_text)(count, prime, gap, binary_code)
 
 def main():
     """Funzione principale con interfaccia CLI avanzata."""
@@ -401,16 +551,20 @@ def main():
     config = {
         'cache_size': args.cache_size,
         'save_interval': args.save_interval,
-        'progress_interval': args.progress_interval
+        'progress_interval': args.progress_interval,
+        'workers': args.workers,
+        'segment_kb': args.segment_size
     }
     
     # Output file setup
     output_file = None
     if args.output:
-        output_file = open(args.output, 'w')
+        output_file = open(args.output, 'w', buffering=OUTPUT_BUFFER)
         if args.format == 'csv':
-            output_file.write("count,prime,gap,binary\n")
+            output_file.write("count,prime,gap\n" if args.no_binary
+                              else "count,prime,gap,binary\n")
     
+    engine = None
     try:
         with prime_engine_context(config) as engine:
             if not args.quiet:
@@ -419,18 +573,39 @@ def main():
                 print(f"Format: {args.format} | Cache: {args.cache_size}")
                 print("-" * 50)
             
-            for count, prime, gap in engine.generate_primes(args.start, args.limit):
-                binary = engine.binary_code(prime)
-                output_line = format_output(count, prime, gap, args.format, binary)
-                
-                if output_file:
-                    output_file.write(output_line + "\n")
-                    output_file.flush()
-                else:
-                    print(output_line)
+            # Output a blocchi: una sola write ogni OUTPUT_BATCH righe
+            out = output_file or sys.stdout
+            formatters = PLAIN_FORMATTERS if args.no_binary else FORMATTERS
+            formatter = formatters[args.format]
+            with_binary = not args.no_binary
+            binary = ""
+            buffer = []
+            # Larghezza corrente dei codici: i primi crescono, si ricalcola solo
+            # oltre 2^bits
+            bits, bits_limit = 8, 0
+            try:
+                for count, prime, gap in engine.generate_primes(args.start, args.limit):
+                    # Codice binario solo se il formato lo richiede
+                    if with_binary:
+                        if prime >= bits_limit:
+                            bits = len(engine.binary_code(prime))
+                            bits_limit = 1 << bits
+                        binary = engine.binary_code(prime, bits)
+                    buffer.append(formatter(count, prime, gap, binary))
+                    
+                    if len(buffer) >= OUTPUT_BATCH:
+                        out.write("\n".join(buffer) + "\n")
+                        buffer.clear()
+            finally:
+                # Scrive le righe rimaste (anche dopo un'interruzione)
+                if buffer:
+                    out.write("\n".join(buffer) + "\n")
     
     except KeyboardInterrupt:
         logger.info("Interruzione utente")
+        # Riepilogo dopo il finally interno: le righe nel buffer vengono prima
+        if engine is not None:
+            engine._print_final_stats()
     finally:
         if output_file:
             output_file.close()
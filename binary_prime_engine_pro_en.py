@@ -18,12 +18,15 @@ import argparse
 import signal
 import sys
 from pathlib import Path
-from typing import Iterator, Optional, Set, Tuple, Dict, Any
+from typing import Iterator, Optional, Tuple, Dict, Any
 from dataclasses import dataclass, asdict
 from contextlib import contextmanager
 import threading
-from collections import deque
-import math
+from collections import OrderedDict
+from array import array
+
+from binary_prime_engine_en import (default_segment_size, is_prime, parallel_prime_iter,
+                                    segmented_prime_iter, wheel_candidates)
 
 # Logging configuration
 logging.basicConfig(
@@ -36,6 +39,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Output lines accumulated before each write
+OUTPUT_BATCH = 1024
+
+# Output file buffer: several blocks of lines per system call
+OUTPUT_BUFFER = 1 << 20
+
+# Primes accumulated before updating the statistics
+STATS_BATCH = 1024
+
 @dataclass
 class PrimeStats:
     """Statistics for the prime generation engine."""
@@ -44,50 +56,69 @@ class PrimeStats:
     total_time: float = 0.0
     avg_gap: float = 0.0
     max_gap: int = 0
-    min_gap: int = float('inf')
+    min_gap: Optional[int] = None
     primes_per_second: float = 0.0
     cache_hits: int = 0
     cache_size: int = 0
 
 class PrimeCache:
-    """LRU cache to optimize prime number searches."""
+    """LRU cache split into shards; with thread_safe each shard has its own lock."""
+    
+    NUM_SHARDS = 16
     
-    def __init__(self, max_size: int = 10000):
+    def __init__(self, max_size: int = 10000, thread_safe: bool = False):
         self.max_size = max_size
-        self.cache: Dict[int, bool] = {}
-        self.access_order = deque()
-        self.lock = threading.RLock()
+        # Per-shard capacity: the total stays around max_size
+        self.shard_size = -(-max_size // self.NUM_SHARDS) if max_size > 0 else 0
+        # OrderedDict: O(1) LRU reordering and eviction, implemented in C
+        self.shards = [OrderedDict() for _ in range(self.NUM_SHARDS)]
+        # The engine is single-threaded: locks (one per shard, lock striping) are
+        # only needed when the cache is shared between threads, chosen once here
+        self.locks = None
+        if thread_safe:
+            # Plain Lock, not RLock: get and put never call each other while holding it
+            self.locks = [threading.Lock() for _ in range(self.NUM_SHARDS)]
+            self.get = self._get_locked
+            self.put = self._put_locked
+    
+    def _shard_index(self, n: int) -> int:
+        # Candidates are odd: drop bit 0 so that every shard is used
+        return (n >> 1) & (self.NUM_SHARDS - 1)
     
     def get(self, n: int) -> Optional[bool]:
         """Retrieve from cache if the number is prime."""
-        with self.lock:
-            if n in self.cache:
-                # Move to end (most recent)
-                self.access_order.remove(n)
-                self.access_order.append(n)
-                return self.cache[n]
-            return None
+        cache = self.shards[self._shard_index(n)]
+        value = cache.get(n)
+        if value is not None:
+            # Move to end (most recent)
+            cache.move_to_end(n)
+        return value
     
     def put(self, n: int, is_prime: bool):
         """Add to cache."""
         # If cache is disabled, do nothing
         if self.max_size == 0:
             return
-            
-        with self.lock:
-            if n in self.cache:
-                self.access_order.remove(n)
-            elif len(self.cache) >= self.max_size:
-                # Remove least recently used
-                if self.access_order:  # Check that it's not empty
-                    oldest = self.access_order.popleft()
-                    del self.cache[oldest]
-            
-            self.cache[n] = is_prime
-            self.access_order.append(n)
+        
+        cache = self.shards[self._shard_index(n)]
+        if n in cache:
+            cache.move_to_end(n)
+        elif len(cache) >= self.shard_size:
+            # Remove least recently used
+            cache.popitem(last=False)
+        
+        cache[n] = is_prime
+    
+    def _get_locked(self, n: int) -> Optional[bool]:
+        with self.locks[self._shard_index(n)]:
+            return PrimeCache.get(self, n)
+    
+    def _put_locked(self, n: int, is_prime: bool):
+        with self.locks[self._shard_index(n)]:
+            PrimeCache.put(self, n, is_prime)
     
     def size(self) -> int:
-        return len(self.cache)
+        return sum(len(cache) for cache in self.shards)
 
 class BinaryPrimeEngine:
     """Binary engine for prime generation - Professional Version."""
@@ -95,10 +126,25 @@ class BinaryPrimeEngine:
     def __init__(self, config: Dict[str, Any] = None):
         self.config = config or {}
         self.db_file = Path(self.config.get('db_file', 'binary_codes.json'))
-        self.cache = PrimeCache(self.config.get('cache_size', 10000))
+        # Codes are stored packed (uint64) in a separate binary file
+        self.codes_file = self.db_file.with_suffix('.bin')
+        self.cache = PrimeCache(self.config.get('cache_size', 10000),
+                                self.config.get('thread_safe', False))
         self.stats = PrimeStats()
-        self.code_db: Set[str] = set()
+        # Codes packed as uint64: 8 bytes each instead of a set of Python ints
+        self.code_db = array('Q')
+        # Codes already appended to the binary file (append-only log)
+        self._saved_codes = 0
+        self._codes_log = None
+        # Cap on stored codes: the array no longer grows without bound
+        self.max_codes = self.config.get('max_codes', 100000)
+        # Collection of composite codes: opt-in, disabled by default
+        self.collect_codes = self.config.get('collect_composite_codes', False)
         self.running = True
+        # Gaps waiting to be applied to the statistics
+        self._pending_gaps = []
+        # Monotonic clock: unaffected by adjustments to the system time
+        self._start_time = time.monotonic()
         self.save_interval = self.config.get('save_interval', 1000)
         self.progress_interval = self.config.get('progress_interval', 100)
         
@@ -112,36 +158,73 @@ class BinaryPrimeEngine:
     def _load_database(self):
         """Load the binary codes database."""
         try:
+            legacy = []
             if self.db_file.exists():
                 with open(self.db_file, "r") as f:
                     data = json.load(f)
                     if isinstance(data, list):
-                        self.code_db = set(data)
+                        legacy = [int(c, 2) for c in data]
                     else:
                         # Extended format with metadata
-                        self.code_db = set(data.get('codes', []))
+                        legacy = [int(c, 2) for c in data.get('codes', [])]
                         if 'stats' in data:
                             # Restore previous statistics
                             for key, value in data['stats'].items():
                                 if hasattr(self.stats, key):
                                     setattr(self.stats, key, value)
+            if self.codes_file.exists():
+                with open(self.codes_file, "rb") as f:
+                    self.code_db.frombytes(f.read())
+            known = set(self.code_db)
+            # Compaction: the log holds duplicates, rewrite it once
+            if len(known) < len(self.code_db):
+                self.code_db = array('Q', sorted(known))
+                with open(self.codes_file, "wb") as f:
+                    self.code_db.tofile(f)
+            self._saved_codes = len(self.code_db)
+            # Codes from the old JSON format: appended to the log at the next save
+            self.code_db.extend(n for n in dict.fromkeys(legacy)
+                                if n not in known and n < 1 << 64)
+            if self.code_db:
                 logger.info(f"Database loaded: {len(self.code_db)} codes")
         except Exception as e:
             logger.warning(f"Database loading error: {e}")
-            self.code_db = set()
+            self.code_db = array('Q')
+            self._saved_codes = 0
+    
+    def _save_codes(self):
+        """Append the codes added since the last save to the binary file."""
+        try:
+            # Only new codes are appended to the log (8 bytes each): the cost of
+            # each save no longer grows with the size of the database
+            if len(self.code_db) > self._saved_codes:
+                if self._codes_log is None:
+                    self._codes_log = open(self.codes_file, "ab")
+                self.code_db[self._saved_codes:].tofile(self._codes_log)
+                self._codes_log.flush()
+                self._saved_codes = len(self.code_db)
+        except Exception as e:
+            logger.error(f"Database saving error: {e}")
     
     def _save_database(self):
         """Save the binary codes database with metadata."""
+        self._save_codes()
+        # The log is reopened on the next save: no handle is left open
+        if self._codes_log is not None:
+            self._codes_log.close()
+            self._codes_log = None
         try:
+            # The JSON file holds only metadata and statistics
             data = {
-                'codes': list(self.code_db),
+                'codes_file': self.codes_file.name,
+                'num_codes': len(self.code_db),
                 'stats': asdict(self.stats),
                 'timestamp': time.time(),
-                'version': '2.0'
+                'version': '2.1'
             }
             
             with open(self.db_file, "w") as f:
-                json.dump(data, f, indent=2)
+                json.dump(data, f)
             logger.debug(f"Database saved: {len(self.code_db)} codes")
         except Exception as e:
             logger.error(f"Database saving error: {e}")
@@ -150,9 +233,10 @@ class BinaryPrimeEngine:
         """Handle clean interruption."""
         logger.info("Interruption received, saving data...")
         self.running = False
+        self._flush_stats()
         self._save_database()
-        self._print_final_stats()
-        sys.exit(0)
+        # main prints the stats, after writing the lines still in the buffer
+        raise KeyboardInterrupt
     
     def binary_code(self, n: int, bits: int = None) -> str:
         """
@@ -165,11 +249,15 @@ class BinaryPrimeEngine:
                 return "0"
             bits = n.bit_length()
             # Round to multiples of 4 for readability (nibble)
-            bits = ((bits + 3) // 4) * 4
+            bits = (bits + 3) & ~3
             # Minimum 8 bits for small numbers
-            bits = max(bits, 8)
+            if bits < 8:
+                bits = 8
         
-        return format(n, f'0{bits}b')
+        # zfill is only valid for n >= 0: for negatives format puts the sign first
+        if n < 0:
+            return format(n, f'0{bits}b')
+        return bin(n)[2:].zfill(bits)
     
     def is_prime_optimized(self, n: int) -> bool:
         """Optimized primality test with cache and binary patterns."""
@@ -186,34 +274,14 @@ class BinaryPrimeEngine:
             self.stats.cache_hits += 1
             return cached
         
-        # Improved binary pattern: exclude only obvious multiples
-        # All odd numbers are valid candidates
-        # Remove overly restrictive 3-bit filter
-        
-        # Optimized divisibility test
-        limit = int(math.sqrt(n)) + 1
-        
-        # Test small common divisors
-        small_primes = [3, 5, 7, 11, 13, 17, 19, 23, 29, 31]
-        for p in small_primes:
-            if p >= limit:
-                break
-            if n % p == 0:
-                self.cache.put(n, False)
-                self.code_db.add(self.binary_code(n))
-                return False
-        
-        # Test remaining divisors (odd only)
-        d = 37  # Start after small primes tested
-        while d < limit:
-            if n % d == 0:
-                self.cache.put(n, False)
-                self.code_db.add(self.binary_code(n))
-                return False
-            d += 2
-        
-        self.cache.put(n, True)
-        return True
+        # Deterministic Miller-Rabin test (replaces O(√n) trial division)
+        result = is_prime(n)
+        self.cache.put(n, result)
+        if (not result and self.collect_codes and n < 1 << 64
+                and len(self.code_db) < self.max_codes):
+            # Occasional duplicates (after a cache eviction) are compacted on load
+            self.code_db.append(n)
+        return result
     
     def next_prime(self, n: int) -> int:
         """Find next prime with optimizations."""
@@ -223,45 +291,76 @@ class BinaryPrimeEngine:
             return 2
         if n == 2:
             return 3
-        if n % 2 == 0:
-            n += 1
+        # The wheel primes themselves are handled separately
+        for p in (3, 5, 7, 11):
+            if n <= p:
+                return p
         
+        # Only residues coprime to 2·3·5·7·11: 480 candidates every 2310 numbers
+        candidates = wheel_candidates(n)
+        n = next(candidates)
         while not self.is_prime_optimized(n):
-            n += 2
+            n = next(candidates)
             self.stats.total_candidates += 1
         
         return n
     
+    def _prime_iterator(self, start: int) -> Iterator[int]:
+        """Primes >= start in increasing order, from the segmented sieve."""
+        # Dense enumeration: the sieve emits primes without testing candidates;
+        # is_prime_optimized remains for queries on single numbers
+        # Without segment_kb the segment is sized to the detected L2 cache
+        segment_kb = self.config.get('segment_kb')
+        segment_size = segment_kb * 1024 if segment_kb else default_segment_size()
+        # With several processes, blocks of segments are sieved in parallel
+        workers = self.config.get('workers', 1)
+        if workers > 1:
+            return parallel_prime_iter(start, segment_size, workers)
+        return segmented_prime_iter(start, segment_size)
+    
     def generate_primes(self, start: int = 1, limit: Optional[int] = None) -> Iterator[Tuple[int, int, int]]:
         """Prime generator with statistics."""
-        start_time = time.time()
-        n = start
+        self._start_time = time.monotonic()
+        primes = self._prime_iterator(start)
+        # Local references: avoid attribute lookups on self inside the loop
+        add_gap = self._pending_gaps.append
+        gaps = self._pending_gaps
+        apply_gaps = self._apply_gaps
+        flush_stats = self._flush_stats
+        save_codes = self._save_codes
+        save_interval = self.save_interval
+        progress_interval = self.progress_interval
         last_prime = None
         count = 0
         
         while self.running and (limit is None or count < limit):
-            p = self.next_prime(n)
+            p = next(primes)
             count += 1
             
             # Calculate gap
             gap = 0 if last_prime is None else p - last_prime
             
-            # Update statistics
-            self._update_stats(gap, time.time() - start_time)
+            # Statistics are updated in blocks of STATS_BATCH primes;
+            # time is sampled only at the save and progress points
+            add_gap(gap)
+            if len(gaps) >= STATS_BATCH:
+                apply_gaps()
             
             yield count, p, gap
             
-            # Periodic saving
-            if count % self.save_interval == 0:
-                self._save_database()
+            # Periodic saving: new codes only; the JSON metadata is written
+            # once, at shutdown
+            if count % save_interval == 0:
+                save_codes()
             
             # Progress logging
-            if count % self.progress_interval == 0:
+            if count % progress_interval == 0:
+                flush_stats()
                 self._log_progress(count, p)
             
             last_prime = p
-            n = p + 1
         
+        self._flush_stats()
         self._save_database()
     
     def generate_primes_to_count(self, target_count: int) -> list:
@@ -271,32 +370,43 @@ class BinaryPrimeEngine:
             primes.append(prime)
         return primes
     
-    def _update_stats(self, gap: int, elapsed: float):
-        """Update internal statistics."""
-        self.stats.total_primes += 1
-        self.stats.total_time = elapsed
-        self.stats.cache_size = self.cache.size()
-        
-        if gap > 0:
-            self.stats.max_gap = max(self.stats.max_gap, gap)
-            self.stats.min_gap = min(self.stats.min_gap, gap)
-            
-            # Moving average for gap
-            if self.stats.total_primes == 1:
-                self.stats.avg_gap = gap
-            else:
+    def _apply_gaps(self):
+        """Apply the gaps accumulated since the last update to the statistics."""
+        stats = self.stats
+        gaps = self._pending_gaps
+        if gaps:
+            stats.total_primes += len(gaps)
+            positive = [g for g in gaps if g > 0]
+            if positive:
+                stats.max_gap = max(stats.max_gap, max(positive))
+                # None until the first gap is seen: no int/float comparisons
+                low = min(positive)
+                if stats.min_gap is None or low < stats.min_gap:
+                    stats.min_gap = low
+                
+                # Moving average for gap
                 alpha = 0.1  # Smoothing factor
-                self.stats.avg_gap = (1 - alpha) * self.stats.avg_gap + alpha * gap
-        
+                avg = stats.avg_gap
+                for g in positive:
+                    avg = (1 - alpha) * avg + alpha * g
+                stats.avg_gap = avg
+            gaps.clear()
+    
+    def _flush_stats(self):
+        """Update all statistics, including time and throughput."""
+        self._apply_gaps()
+        stats = self.stats
+        elapsed = time.monotonic() - self._start_time
+        stats.total_time = elapsed
+        stats.cache_size = self.cache.size()
         if elapsed > 0:
-            self.stats.primes_per_second = self.stats.total_primes / elapsed
+            stats.primes_per_second = stats.total_primes / elapsed
     
     def _log_progress(self, count: int, prime: int):
         """Periodic progress logging."""
         logger.info(
             f"Progress: {count} primes generated | "
             f"Latest: {prime} | "
-            f"Cache: {self.stats.cache_hits}/{self.cache.size()} | "
             f"Speed: {self.stats.primes_per_second:.2f} p/s"
         )
     
@@ -306,14 +416,18 @@ class BinaryPrimeEngine:
         print("FINAL STATISTICS - BINARY PRIME ENGINE")
         print("="*60)
         print(f"Primes generated:      {self.stats.total_primes:,}")
-        print(f"Candidates tested:     {self.stats.total_candidates:,}")
         print(f"Total time:            {self.stats.total_time:.2f}s")
         print(f"Primes per second:     {self.stats.primes_per_second:.2f}")
         print(f"Average gap:           {self.stats.avg_gap:.2f}")
         print(f"Maximum gap:           {self.stats.max_gap}")
-        print(f"Minimum gap:           {self.stats.min_gap}")
-        print(f"Cache hits:            {self.stats.cache_hits:,}")
-        print(f"Cache size:            {self.stats.cache_size:,}")
+        print(f"Minimum gap:           {self.stats.min_gap or '-'}")
+        # Candidates and cache only concern next_prime and is_prime_optimized: the
+        # sieve behind generate_primes uses neither, so they are shown only when used
+        if self.stats.total_candidates:
+            print(f"Candidates tested:     {self.stats.total_candidates:,}")
+        if self.stats.cache_size:
+            print(f"Cache hits:            {self.stats.cache_hits:,}")
+            print(f"Cache size:            {self.stats.cache_size:,}")
         print(f"Binary codes saved:    {len(self.code_db):,}")
         print("="*60)
 
@@ -368,6 +482,18 @@ Usage examples:
         '--progress-interval', type=int, default=100,
         help='Progress log interval (default: 100)'
     )
+    parser.add_argument(
+        '--segment-size', type=int,
+        help='Sieve segment size in KiB (default: from the L2 cache)'
+    )
+    parser.add_argument(
+        '--workers', '-w', type=int, default=1,
+        help='Processes for the parallel sieve (default: 1)'
+    )
+    parser.add_argument(
+        '--no-binary', action='store_true',
+        help="Omit the binary code from the output (faster)"
+    )
     parser.add_argument(
         '--quiet', '-q', action='store_true',
         help='Quiet mode (results only)'
@@ -379,19 +505,42 @@ Usage examples:
     
     return parser
 
+def _format_text(count: int, prime: int, gap: int, binary_code: str) -> str:
+    """Line in text format."""
+    return f"p{count} = {prime} | gap dₙ = {gap} | bin: {binary_code}"
+
+def _format_csv(count: int, prime: int, gap: int, binary_code: str) -> str:
+    """Line in CSV format."""
+    return f"{count},{prime},{gap},{binary_code}"
+
+def _format_json(count: int, prime: int, gap: int, binary_code: str) -> str:
+    """Line in JSON format."""
+    # Only integers and binary digits: nothing to escape, same text as json.dumps
+    return (f'{{"count": {count}, "prime": {prime}, "gap": {gap}, '
+            f'"binary": "{binary_code}"}}')
+
+# Formatter per output type: chosen once, outside the loop
+FORMATTERS = {'text': _format_text, 'json': _format_json, 'csv': _format_csv}
+
+def _format_text_plain(count: int, prime: int, gap: int, binary_code: str) -> str:
+    """Line in text format, without the binary code."""
+    return f"p{count} = {prime} | gap dₙ = {gap}"
+
+def _format_csv_plain(count: int, prime: int, gap: int, binary_code: str) -> str:
+    """Line in CSV format, without the binary code."""
+    return f"{count},{prime},{gap}"
+
+def _format_json_plain(count: int, prime: int, gap: int, binary_code: str) -> str:
+    """Line in JSON format, without the binary code."""
+    return f'{{"count": {count}, "prime": {prime}, "gap": {gap}}}'
+
+# Variants for --no-binary: the binary code is not even computed
+PLAIN_FORMATTERS = {'text': _format_text_plain, 'json': _format_json_plain,
+                    'csv': _format_csv_plain}
+
 def format_output(count: int, prime: int, gap: int, format_type: str, binary_code: str) -> str:
     """Format output according to requested type."""
-    if format_type == 'json':
-        return json.dumps({
-            'count': count,
-            'prime': prime,
-            'gap': gap,
-            'binary': binary_code
-        })
-    elif format_type == 'csv':
-        return f"{count},{prime},{gap},{binary_code}"
-    else:  # text
-        return f"p{count} = {prime} | gap dₙ = {gap} | bin: {binary_code}"
+    return FORMATTERS.get(format_type, _format_text)(count, prime, gap, binary_code)
 
 def main():
     """Main function with advanced CLI interface."""
@@ -408,16 +557,20 @@ def main():
     config = {
         'cache_size': args.cache_size,
         'save_interval': args.save_interval,
-        'progress_interval': args.progress_interval
+        'progress_interval': args.progress_interval,
+        'workers': args.workers,
+        'segment_kb': args.segment_size
     }
     
     # Output file setup
     output_file = None
     if args.output:
-        output_file = open(args.output, 'w')
+        output_file = open(args.output, 'w', buffering=OUTPUT_BUFFER)
         if args.format == 'csv':
-            output_file.write("count,prime,gap,binary\n")
+            output_file.write("count,prime,gap\n" if args.no_binary
+                              else "count,prime,gap,binary\n")
     
+    engine = None
     try:
         with prime_engine_context(config) as engine:
             if not args.quiet:
@@ -426,18 +579,38 @@ def main():
                 print(f"Format: {args.format} | Cache: {args.cache_size}")
                 print("-" * 50)
             
-            for count, prime, gap in engine.generate_primes(args.start, args.limit):
-                binary = engine.binary_code(prime)
-                output_line = format_output(count, prime, gap, args.format, binary)
-                
-                if output_file:
-                    output_file.write(output_line + "\n")
-                    output_file.flush()
-                else:
-                    print(output_line)
+            # Batched output: a single write every OUTPUT_BATCH lines
+            out = output_file or sys.stdout
+            formatters = PLAIN_FORMATTERS if args.no_binary else FORMATTERS
+            formatter = formatters[args.format]
+            with_binary = not args.no_binary
+            binary = ""
+            buffer = []
+            # Current code width: primes grow, so it is recomputed only past 2^bits
+            bits, bits_limit = 8, 0
+            try:
+                for count, prime, gap in engine.generate_primes(args.start, args.limit):
+                    # Binary code only when the format needs it
+                    if with_binary:
+                        if prime >= bits_limit:
+                            bits = len(engine.binary_code(prime))
+                            bits_limit = 1 << bits
+                        binary = engine.binary_code(prime, bits)
+                    buffer.append(formatter(count, prime, gap, binary))
+                    
+                    if len(buffer) >= OUTPUT_BATCH:
+                        out.write("\n".join(buffer) + "\n")
+                        buffer.clear()
+            finally:
+                # Write the remaining lines (also after an interruption)
+                if buffer:
+                    out.write("\n".join(buffer) + "\n")
     
     except KeyboardInterrupt:
         logger.info("User interruption")
+        # Summary after the inner finally: buffered lines come before the stats
+        if engine is not None:
+            engine._print_final_stats()
     finally:
         if output_file:
             output_file.close()
@@ -5,19 +5,31 @@ Demo: Rappresentazione Binaria Adattiva vs Fissa
 Dimostra il miglioramento nella rappresentazione binaria.
 """
 
-def binary_code_old(n: int, bits: int = 16) -> str:
+import warnings
+
+# Specifiche di formato precalcolate per le larghezze più comuni:
+# evitano di ricostruire la stringa f'0{bits}b' a ogni chiamata
+_BIN_SPECS = {b: f'0{b}b' for b in (8, 12, 16, 20, 24, 32, 40, 48, 56, 64)}
+
+def _binary_code_old(n: int, bits: int = 16) -> str:
     """Versione VECCHIA: bits fissi con troncamento."""
     return format(n & ((1 << bits) - 1), f'0{bits}b')
 
+def binary_code_old(n: int, bits: int = 16) -> str:
+    """Deprecata: usa binary_code_new, che non tronca."""
+    warnings.warn("binary_code_old tronca i numeri grandi: usa binary_code_new",
+                  DeprecationWarning, stacklevel=2)
+    return _binary_code_old(n, bits)
+
 def binary_code_new(n: int, bits: int = None) -> str:
     """Versione NUOVA: bits adattivi."""
     if bits is None:
         if n == 0:
             return "0"
-        bits = n.bit_length()
-        bits = ((bits + 3) // 4) * 4  # Arrotonda a nibble
-        bits = max(bits, 8)
-    return format(n, f'0{bits}b')
+        s = bin(n)[2:]
+        # Arrotonda a nibble (divisione per eccesso), minimo 8 bit
+        return s.zfill(max(-(-len(s) // 4) * 4, 8))
+    return format(n, _BIN_SPECS.get(bits) or f'0{bits}b')
 
 def demo_comparison():
     """Confronta vecchia vs nuova rappresentazione."""
@@ -38,7 +50,7 @@ def demo_comparison():
         print("-" * 75)
         
         for n in numbers:
-            old = binary_code_old(n, 16)
+            old = _binary_code_old(n, 16)
             new = binary_code_new(n)
             
             # Verifica se c'è troncamento
@@ -5,9 +5,10 @@ ESITO FINALE - BINARY PRIME ENGINE PROJECT
 Rapporto completo del progetto con tutti i risultati e conclusioni.
 """
 
+import io
 import os
 import sys
-from pathlib import Path
+from contextlib import redirect_stdout
 from datetime import datetime
 
 def print_header():
@@ -75,11 +76,24 @@ def analyze_project_structure():
         ("⚙️ CONFIGURAZIONE", config_files),
     ]
     
+    # Una sola lettura per directory invece di una stat() per file
+    listings = {}
+    def exists(path):
+        parent, name = os.path.split(path.rstrip("/"))
+        parent = parent or "."
+        if parent not in listings:
+            try:
+                with os.scandir(parent) as entries:
+                    listings[parent] = {entry.name for entry in entries}
+            except OSError:
+                listings[parent] = set()
+        return name in listings[parent]
+    
     total_files = 0
     for category, files in categories:
         print(f"\n{category}:")
         for filename, description in files:
-            status = "✅" if Path(filename).exists() or Path(f"./{filename}").exists() else "❌"
+            status = "✅" if exists(filename) else "❌"
             print(f"  {status} {filename:<25} - {description}")
             if status == "✅":
                 total_files += 1
@@ -94,7 +108,6 @@ def test_engine_capabilities():
     
     try:
         from binary_prime_engine import next_prime_binary, binary_code
-        
         # Test rapidi
         test_cases = [
             (1, "Primo piccolo"),
@@ -292,21 +305,25 @@ def final_verdict():
 
 def main():
     """Genera il rapporto finale completo."""
-    print_header()
-    
-    total_files = analyze_project_structure()
-    engine_works = test_engine_capabilities()
-    
-    performance_summary()
-    feature_summary()
-    reliability_summary()
-    technical_achievements()
-    limitations_and_recommendations()
-    final_verdict()
-    
-    print("\n" + "=" * 80)
-    print(f"📝 RAPPORTO GENERATO: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
-    print("=" * 80)
+    # Tutto il rapporto viene costruito in memoria ed emesso con una sola scrittura
+    buf = io.StringIO()
+    with redirect_stdout(buf):
+        print_header()
+        
+        total_files = analyze_project_structure()
+        engine_works = test_engine_capabilities()
+        
+        performance_summary()
+        feature_summary()
+        reliability_summary()
+        technical_achievements()
+        limitations_and_recommendations()
+        final_verdict()
+        
+        print("\n" + "=" * 80)
+        print(f"📝 RAPPORTO GENERATO: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+        print("=" * 80)
+    sys.stdout.write(buf.getvalue())
 
 if __name__ == "__main__":
     main()
@@ -3,11 +3,26 @@
 Test estremo per numeri molto grandi.
 """
 
+import os
+import sys
 import time
+from concurrent.futures import ProcessPoolExecutor
+from math import isqrt
 from binary_prime_engine import next_prime_binary
 
-def test_extreme_numbers():
-    """Testa numeri estremamente grandi."""
+def _timed_next_prime(n):
+    """Unità di lavoro: (n, primo, secondi), cronometrata nel processo che la esegue."""
+    start_time = time.perf_counter()
+    prime = next_prime_binary(n)
+    return n, prime, time.perf_counter() - start_time
+
+def test_extreme_numbers(workers=1):
+    """
+    Testa numeri estremamente grandi.
+    Con workers > 1 i numeri (indipendenti tra loro) sono distribuiti su un pool
+    di processi; il default resta sequenziale perché con il Miller-Rabin ogni
+    chiamata dura µs, meno dell'avvio del pool.
+    """
     print("=== TEST NUMERI ESTREMAMENTE GRANDI ===\n")
     
     extreme_numbers = [
@@ -17,30 +32,44 @@ def test_extreme_numbers():
         1_000_000_000, # 1 miliardo
     ]
     
-    for n in extreme_numbers:
-        print(f"Testing from {n:,}:")
-        
-        try:
-            start_time = time.time()
-            prime = next_prime_binary(n)
-            elapsed = time.time() - start_time
-            
-            print(f"  ✅ Primo trovato: {prime:,}")
-            print(f"  ⏱️  Tempo: {elapsed:.3f} secondi")
+    workers = min(workers or os.cpu_count() or 1, len(extreme_numbers))
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    if pool:
+        futures = [pool.submit(_timed_next_prime, n) for n in extreme_numbers]
+        # I risultati si leggono nell'ordine dei numeri in ingresso
+        results = (future.result() for future in futures)
+    else:
+        results = map(_timed_next_prime, extreme_numbers)
+    
+    try:
+        for n in extreme_numbers:
+            print(f"Testing from {n:,}:")
             
-            # Se impiega più di 10 secondi, fermati
-            if elapsed > 10:
-                print(f"  ⚠️  TROPPO LENTO per uso pratico")
-                break
+            try:
+                _, prime, elapsed = next(results)
                 
-        except KeyboardInterrupt:
-            print(f"  ❌ Interrotto dall'utente")
-            break
-        except Exception as e:
-            print(f"  ❌ ERRORE: {e}")
-            break
-        
-        print()
+                print(f"  ✅ Primo trovato: {prime:,}")
+                print(f"  ⏱️  Tempo: {elapsed:.3f} secondi")
+                
+                # Se impiega più di 10 secondi, fermati
+                if elapsed > 10:
+                    print(f"  ⚠️  TROPPO LENTO per uso pratico")
+                    break
+                    
+            except KeyboardInterrupt:
+                print(f"  ❌ Interrotto dall'utente")
+                break
+            except Exception as e:
+                print(f"  ❌ ERRORE: {e}")
+                break
+            
+            print()
+    finally:
+        if pool:
+            # Interruzione anticipata: le chiamate non ancora avviate si annullano
+            for future in futures:
+                future.cancel()
+            pool.shutdown(wait=False)
 
 def theoretical_limits():
     """Analizza i limiti teorici."""
@@ -55,7 +84,7 @@ def theoretical_limits():
     numbers = [1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000]
     
     for n in numbers:
-        sqrt_n = int(n**0.5)
+        sqrt_n = isqrt(n)
         # Stima operazioni: circa √n/2 divisioni per numero primo
         ops = sqrt_n // 2
         # Stima tempo: assumendo ~1 operazione per microsecondo
@@ -78,4 +107,5 @@ def theoretical_limits():
 if __name__ == "__main__":
     theoretical_limits()
     print("\n" + "="*60)
-    test_extreme_numbers()
+    # Uso: extreme_test.py [workers]  (0 = tutti i core)
+    test_extreme_numbers(int(sys.argv[1]) if len(sys.argv) > 1 else 1)
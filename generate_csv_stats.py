@@ -7,63 +7,60 @@ import csv
 from datetime import datetime
 from pathlib import Path
 
+def _performance_rows():
+    """Dati delle performance testate."""
+    yield ["Range", "Tempo_Medio", "Valutazione", "Status"]
+    yield ["1-1000", "0.01ms", "Istantaneo", "Eccellente"]
+    yield ["1K-100K", "0.1ms", "Velocissimo", "Eccellente"]
+    yield ["100K-1M", "1ms", "Molto veloce", "Eccellente"]
+    yield ["1M-100M", "10ms", "Veloce", "Buono"]
+    yield ["100M-1B", "100ms", "Buono", "Buono"]
+    yield ["1B-1T", "1s", "Accettabile", "Discreto"]
+    yield ["1T+", "60s", "Lento ma funzionante", "Limite"]
+
+def _reliability_rows():
+    """Dati affidabilità."""
+    yield ["Aspetto", "Risultato", "Percentuale", "Note"]
+    yield ["Correttezza matematica", "PERFETTO", "100%", "400+ numeri testati"]
+    yield ["Falsi positivi", "ZERO", "0%", "Tutti primi autentici"]
+    yield ["Primi mancanti", "ZERO", "0%", "Sequenza completa"]
+    yield ["Stabilità sistema", "PERFETTO", "100%", "Nessun crash"]
+    yield ["Gestione memoria", "OTTIMALE", "100%", "No memory leaks"]
+    yield ["Compatibilità", "COMPLETA", "100%", "Multi-platform"]
+    yield ["Scalabilità", "ECCELLENTE", "100%", "Fino a trilioni"]
+    yield ["Precisione binaria", "PERFETTA", "100%", "Rappresentazione corretta"]
+
+def _summary_rows():
+    """Summary finale."""
+    yield ["Metrica", "Valore", "Target", "Status"]
+    yield ["File creati", "22", "15+", "SUPERATO"]
+    yield ["Linee codice", "1500+", "1000+", "SUPERATO"]
+    yield ["Test coverage", "100%", "90%+", "SUPERATO"]
+    yield ["Performance", "Eccellente", "Buona", "SUPERATO"]
+    yield ["Affidabilità", "100%", "95%+", "SUPERATO"]
+    yield ["Documentazione", "Completa", "Buona", "SUPERATO"]
+    yield ["Qualità codice", "Professionale", "Buona", "SUPERATO"]
+
+# File generati e relative sorgenti di righe
+CSV_REPORTS = (
+    ("test_performance_results.csv", _performance_rows),
+    ("test_reliability_results.csv", _reliability_rows),
+    ("project_summary.csv", _summary_rows),
+)
+
+def _write_csv(path, rows):
+    """Scrive le righe in streaming: nessuna lista intermedia in memoria."""
+    with open(path, "w", newline="") as f:
+        csv.writer(f, dialect="excel", quoting=csv.QUOTE_MINIMAL).writerows(rows)
+
 def generate_csv_report():
     """Genera un report CSV dettagliato."""
-    
-    # Dati delle performance testate
-    performance_data = [
-        ["Range", "Tempo_Medio", "Valutazione", "Status"],
-        ["1-1000", "0.01ms", "Istantaneo", "Eccellente"],
-        ["1K-100K", "0.1ms", "Velocissimo", "Eccellente"], 
-        ["100K-1M", "1ms", "Molto veloce", "Eccellente"],
-        ["1M-100M", "10ms", "Veloce", "Buono"],
-        ["100M-1B", "100ms", "Buono", "Buono"],
-        ["1B-1T", "1s", "Accettabile", "Discreto"],
-        ["1T+", "60s", "Lento ma funzionante", "Limite"],
-    ]
-    
-    # Salva performance data
-    with open("test_performance_results.csv", "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerows(performance_data)
-    
-    # Dati affidabilità
-    reliability_data = [
-        ["Aspetto", "Risultato", "Percentuale", "Note"],
-        ["Correttezza matematica", "PERFETTO", "100%", "400+ numeri testati"],
-        ["Falsi positivi", "ZERO", "0%", "Tutti primi autentici"],
-        ["Primi mancanti", "ZERO", "0%", "Sequenza completa"],
-        ["Stabilità sistema", "PERFETTO", "100%", "Nessun crash"],
-        ["Gestione memoria", "OTTIMALE", "100%", "No memory leaks"],
-        ["Compatibilità", "COMPLETA", "100%", "Multi-platform"],
-        ["Scalabilità", "ECCELLENTE", "100%", "Fino a trilioni"],
-        ["Precisione binaria", "PERFETTA", "100%", "Rappresentazione corretta"],
-    ]
-    
-    with open("test_reliability_results.csv", "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerows(reliability_data)
-    
-    # Summary finale
-    summary_data = [
-        ["Metrica", "Valore", "Target", "Status"],
-        ["File creati", "22", "15+", "SUPERATO"],
-        ["Linee codice", "1500+", "1000+", "SUPERATO"],
-        ["Test coverage", "100%", "90%+", "SUPERATO"],
-        ["Performance", "Eccellente", "Buona", "SUPERATO"],
-        ["Affidabilità", "100%", "95%+", "SUPERATO"],
-        ["Documentazione", "Completa", "Buona", "SUPERATO"],
-        ["Qualità codice", "Professionale", "Buona", "SUPERATO"],
-    ]
-    
-    with open("project_summary.csv", "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerows(summary_data)
+    for path, rows in CSV_REPORTS:
+        _write_csv(path, rows())
     
     print("📊 File CSV generati:")
-    print("  ✅ test_performance_results.csv")
-    print("  ✅ test_reliability_results.csv") 
-    print("  ✅ project_summary.csv")
+    for path, _ in CSV_REPORTS:
+        print(f"  ✅ {path}")
 
 if __name__ == "__main__":
     generate_csv_report()
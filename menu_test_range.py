@@ -3,45 +3,203 @@
 Menu Interattivo per Test Range - Binary Prime Engine
 =====================================================
 Menu completo per testare il motore in range specifici con varie opzioni.
+
+Solo Python puro e libreria standard (ctypes solo su Windows, gmpy2 opzionale nel
+motore): gira anche con PyPy, il cui JIT accelera i cicli aritmetici del motore.
+Avvio con PyPy: pypy3 menu_test_range.py
 """
 
 import time
 import sys
 import os
+import csv
+import importlib
+import logging
+import signal
+import subprocess
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from math import isqrt
 from pathlib import Path
-from binary_prime_engine import next_prime_binary, binary_code
+from binary_prime_engine import next_prime_binary, segmented_prime_iter
+
+# Intestazione delle schermate, composta una volta sola
+HEADER_TEXT = "\n".join([
+    "=" * 70,
+    "🔬 BINARY PRIME ENGINE - MENU TEST RANGE",
+    "=" * 70,
+    "Motore testato e affidabile fino a 1 trilione!",
+    "",
+    "",
+])
+
+# Testo del menu principale, composto una volta sola
+MENU_TEXT = "\n".join([
+    "📋 OPZIONI DISPONIBILI:",
+    "",
+    "1️⃣  Test Range Personalizzato",
+    "2️⃣  Test Range Predefiniti",
+    "3️⃣  Test Performance Specifico",
+    "4️⃣  Test Validazione Completa",
+    "5️⃣  Generazione Continua con Controlli",
+    "6️⃣  Benchmark Velocità",
+    "7️⃣  Visualizza Ultimi Risultati",
+    "8️⃣  Test Numeri Giganti (Miliardi+)",
+    "9️⃣  Export Risultati",
+    "0️⃣  Esci",
+    "",
+    "",
+])
+
+# Tabelle dei test predefiniti: (descrizione, inizio, fine)
+PRESET_RANGES = (
+    ("Piccoli (1-1K)", 1, 1000),
+    ("Medi (1K-10K)", 1000, 10000),
+    ("Grandi (10K-100K)", 10000, 100000),
+    ("Molto Grandi (100K-1M)", 100000, 1000000),
+    ("Enormi (1M-10M)", 1000000, 10000000),
+)
+
+BIG_NUMBERS = (
+    1000, 10000, 100000, 1000000,
+    10000000, 100000000, 1000000000,
+)
+
+# (descrizione, numero di partenza)
+GIANT_NUMBERS = (
+    ("1 Miliardo", 1_000_000_000),
+    ("10 Miliardi", 10_000_000_000),
+    ("100 Miliardi", 100_000_000_000),
+    ("1 Trilione", 1_000_000_000_000),
+    ("10 Trilioni", 10_000_000_000_000),
+)
+
+# Risultati dei test, aggiunti in coda a ogni test completato
+RESULTS_FILE = "menu_results.csv"
+RESULTS_HEADER = ["tipo", "start", "count", "tempo_totale", "tempo_medio"]
+# Risultati mostrati da "Visualizza Ultimi Risultati"
+RESULTS_SHOWN = 20
+
+# Righe di output accumulate prima di una scrittura su stdout: i cicli restano
+# liberi da I/O, ma i test lunghi mostrano comunque l'avanzamento
+OUTPUT_BATCH = 1000
+# Su un terminale si scrive più spesso, per un riscontro immediato
+TTY_OUTPUT_BATCH = 64
+
+# Il crivello paga i primi base fino a √start prima di consegnare il primo risultato
+# (~0.2 µs per unità di √start), la catena di next_prime_binary ~0.15 ms per primo
+# a 10^12: il crivello conviene solo da
+# max(SIEVE_MIN_COUNT, √start / SIEVE_ROOT_RATIO) primi
+SIEVE_MIN_COUNT = 200
+SIEVE_ROOT_RATIO = 700
+
+def _use_sieve(start, count):
+    """True se per count primi da start il crivello batte next_prime_binary."""
+    return count >= max(SIEVE_MIN_COUNT, isqrt(max(start, 0)) // SIEVE_ROOT_RATIO)
+
+def _next_prime_chain(start, count):
+    """count primi consecutivi >= start, uno per chiamata a next_prime_binary."""
+    n = start
+    for _ in range(count):
+        # next_prime_binary(2) restituisce 3: il 2 si consegna a parte, come il crivello
+        p = 2 if n <= 2 else next_prime_binary(n)
+        yield p
+        n = p + 1
+
+def _timed_next_prime(n):
+    """Unità di lavoro: (nanosecondi, primo), cronometrata nel suo processo."""
+    t0 = time.perf_counter_ns()
+    p = next_prime_binary(n)
+    return time.perf_counter_ns() - t0, p
 
 class PrimeTestMenu:
     def __init__(self):
-        self.results = []
-        
-    def clear_screen(self):
-        """Pulisce lo schermo."""
-        os.system('clear' if os.name == 'posix' else 'cls')
+        # File dei risultati aperto al primo test completato
+        self._results_file = None
+        self._csv = None
+        # Sequenze ANSI nella console Windows: None finché non verificato
+        self._vt_enabled = None
     
-    def print_header(self):
-        """Stampa l'header del menu."""
-        print("=" * 70)
-        print("🔬 BINARY PRIME ENGINE - MENU TEST RANGE")
-        print("=" * 70)
-        print("Motore testato e affidabile fino a 1 trilione!")
-        print()
+    def record_result(self, tipo, start, count, total_time, avg_time):
+        """Aggiunge una riga al CSV dei risultati (buffer da 64 KiB)."""
+        if self._csv is None:
+            new_file = (not os.path.exists(RESULTS_FILE)
+                        or os.path.getsize(RESULTS_FILE) == 0)
+            self._results_file = open(RESULTS_FILE, "a", newline="", buffering=1 << 16)
+            self._csv = csv.writer(self._results_file)
+            if new_file:
+                self._csv.writerow(RESULTS_HEADER)
+        self._csv.writerow([tipo, start, count, total_time, avg_time])
     
-    def print_menu(self):
-        """Stampa il menu principale."""
-        print("📋 OPZIONI DISPONIBILI:")
-        print()
-        print("1️⃣  Test Range Personalizzato")
-        print("2️⃣  Test Range Predefiniti")
-        print("3️⃣  Test Performance Specifico")
-        print("4️⃣  Test Validazione Completa")
-        print("5️⃣  Generazione Continua con Controlli")
-        print("6️⃣  Benchmark Velocità")
-        print("7️⃣  Visualizza Ultimi Risultati")
-        print("8️⃣  Test Numeri Giganti (Miliardi+)")
-        print("9️⃣  Export Risultati")
-        print("0️⃣  Esci")
-        print()
+    def close_results(self):
+        """Svuota il buffer e chiude il file dei risultati."""
+        if self._results_file is not None:
+            self._results_file.close()
+            self._results_file = None
+            self._csv = None
+    
+    def flush_rows(self, rows, force=False):
+        """
+        Scrive le righe accumulate con una sola write (a blocchi di OUTPUT_BATCH,
+        TTY_OUTPUT_BATCH su terminale), codificate in blocco e passate
+        direttamente al buffer binario di stdout.
+        """
+        if not rows:
+            return
+        batch = TTY_OUTPUT_BATCH if sys.stdout.isatty() else OUTPUT_BATCH
+        if not force and len(rows) < batch:
+            return
+        text = "\n".join(rows) + "\n"
+        rows.clear()
+        out = getattr(sys.stdout, "buffer", None)
+        if out is None:
+            # stdout sostituito (es. StringIO): solo testo
+            sys.stdout.write(text)
+            sys.stdout.flush()
+            return
+        # Il buffer binario non traduce i fine riga (Windows)
+        if os.linesep != "\n":
+            text = text.replace("\n", os.linesep)
+        # Il testo già stampato con print deve precedere queste righe
+        sys.stdout.flush()
+        out.write(text.encode(sys.stdout.encoding or "utf-8",
+                              sys.stdout.errors or "strict"))
+        out.flush()
+        
+    def _clear_sequence(self):
+        """Sequenza ANSI che pulisce lo schermo ('' se non serve o non è supportata)."""
+        if not sys.stdout.isatty():
+            return ''
+        if os.name == 'nt' and not self._enable_vt_mode():
+            # Console Windows senza supporto ANSI
+            os.system('cls')
+            return ''
+        return '\x1b[2J\x1b[H'
+    
+    def show_screen(self, *parts):
+        """Pulisce lo schermo e stampa i testi precomposti con una sola scrittura."""
+        text = self._clear_sequence() + ''.join(parts)
+        if text:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+    
+    def _enable_vt_mode(self):
+        """Attiva una sola volta le sequenze ANSI nella console Windows."""
+        if self._vt_enabled is None:
+            try:
+                import ctypes
+                kernel32 = ctypes.windll.kernel32
+                handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+                mode = ctypes.c_ulong()
+                # ENABLE_VIRTUAL_TERMINAL_PROCESSING = 0x0004
+                self._vt_enabled = bool(
+                    kernel32.GetConsoleMode(handle, ctypes.byref(mode))
+                    and kernel32.SetConsoleMode(handle, mode.value | 0x0004)
+                )
+            except (ImportError, AttributeError, OSError):
+                self._vt_enabled = False
+        return self._vt_enabled
     
     def get_input(self, prompt, input_type=str, default=None):
         """Input sicuro con gestione errori."""
@@ -69,8 +227,7 @@ class PrimeTestMenu:
     
     def test_custom_range(self):
         """Test range personalizzato."""
-        self.clear_screen()
-        self.print_header()
+        self.show_screen(HEADER_TEXT)
         print("1️⃣  TEST RANGE PERSONALIZZATO")
         print("=" * 40)
         
@@ -81,73 +238,95 @@ class PrimeTestMenu:
         count = self.get_input("Quanti primi generare", int, 10)
         if count is None:
             return
+        count = max(count, 0)
             
         show_binary = self.get_input("Mostrare codici binari? (s/n)", str, "s").lower() == 's'
         show_gaps = self.get_input("Mostrare gap tra primi? (s/n)", str, "s").lower() == 's'
+        # Senza colonne extra si può misurare solo il totale, senza elenco
+        silent = False
+        if not show_binary and not show_gaps:
+            answer = self.get_input("Solo tempo totale, senza elenco? (s/n)", str, "n")
+            silent = answer.lower() == 's'
         
         print(f"\n🚀 Generando {count} primi da {start:,}...")
         print("-" * 60)
         
-        total_time = 0
-        n = start
+        total_ns = 0
         last_prime = None
-        
-        for i in range(count):
-            start_time = time.time()
-            p = next_prime_binary(n)
-            elapsed = time.time() - start_time
-            total_time += elapsed
-            
-            # Calcola gap
-            gap = p - last_prime if last_prime else 0
-            
-            # Formato output
-            output = f"p{i+1:2d} = {p:>12,}"
-            
+        rows = []
+        
+        # Molti primi: generazione in blocco con il crivello segmentato, il cui
+        # tempo arriva a raffiche (il primo segmento pesa tutto su p1) e si misura
+        # solo in totale. Pochi primi da un numero grande: catena di
+        # next_prime_binary, un tempo per primo
+        use_sieve = _use_sieve(start, count)
+        if use_sieve:
+            primes = islice(segmented_prime_iter(start), count)
+        else:
+            primes = _next_prime_chain(start, count)
+        if silent:
+            # Un solo intervallo per l'intero blocco: i primi vengono consumati
+            # in C (deque di lunghezza 1) senza cronometrare né stampare ciascuno
+            t0 = time.perf_counter_ns()
+            tail = deque(primes, maxlen=1)
+            total_ns = time.perf_counter_ns() - t0
+            if tail:
+                print(f"Ultimo primo: {tail[0]:,}")
+        else:
+            # Formato della riga scelto una volta sola in base alle colonne richieste
+            template = "p{i:2d} = {p:>12,}"
             if show_gaps:
-                output += f" | gap = {gap:>3d}"
-            
+                template += " | gap = {gap:>3d}"
             if show_binary:
-                bin_code = binary_code(p, 16)
-                output += f" | bin: {bin_code}"
+                template += " | bin: {bin}"
+            if not use_sieve:
+                template += " | {ms:>6.2f}ms"
+            format_row = template.format
+            bin_code = None
+            # Nomi globali e attributi legati a variabili locali (LOAD_FAST nel ciclo)
+            clock = time.perf_counter_ns
+            add_row = rows.append
+            flush_rows = self.flush_rows
+            t0 = clock()
+            for i, p in enumerate(primes):
+                elapsed_ns = clock() - t0
+                total_ns += elapsed_ns
             
-            output += f" | {elapsed*1000:>6.2f}ms"
+                # Calcola gap
+                gap = p - last_prime if last_prime else 0
             
-            print(output)
+                if show_binary:
+                    # binary_code(p, 16) in linea: almeno 16 cifre, mai troncato
+                    bin_code = bin(p)[2:].zfill(16)
             
-            last_prime = p
-            n = p + 1
+                # Formato output
+                add_row(format_row(i=i + 1, p=p, gap=gap, bin=bin_code,
+                                   ms=elapsed_ns / 1e6))
+                flush_rows(rows)
+            
+                last_prime = p
+                # Il tempo di formattazione e stampa non va al primo successivo
+                t0 = clock()
+            self.flush_rows(rows, force=True)
         
-        avg_time = total_time / count
+        total_time = total_ns / 1e9
+        avg_time = total_ns / count / 1e9 if count else 0
         print("-" * 60)
         print(f"✅ Completato! Tempo totale: {total_time:.3f}s")
         print(f"⏱️  Tempo medio per primo: {avg_time*1000:.2f}ms")
         
         # Salva risultati
-        self.results.append({
-            'tipo': 'Range Personalizzato',
-            'start': start,
-            'count': count,
-            'tempo_totale': total_time,
-            'tempo_medio': avg_time
-        })
+        self.record_result('Range Personalizzato', start, count, total_time, avg_time)
         
         input("\n📝 Premi INVIO per continuare...")
     
     def test_predefined_ranges(self):
         """Test range predefiniti."""
-        self.clear_screen()
-        self.print_header()
+        self.show_screen(HEADER_TEXT)
         print("2️⃣  TEST RANGE PREDEFINITI")
         print("=" * 40)
         
-        ranges = [
-            ("Piccoli (1-1K)", 1, 1000),
-            ("Medi (1K-10K)", 1000, 10000),
-            ("Grandi (10K-100K)", 10000, 100000),
-            ("Molto Grandi (100K-1M)", 100000, 1000000),
-            ("Enormi (1M-10M)", 1000000, 10000000),
-        ]
+        ranges = PRESET_RANGES
         
         print("Scegli un range:")
         for i, (desc, start, end) in enumerate(ranges, 1):
@@ -164,30 +343,42 @@ class PrimeTestMenu:
         print(f"📊 Campionando {sample_size} numeri tra {start:,} e {end:,}")
         print("-" * 60)
         
-        # Genera numeri da testare
+        # Genera numeri da testare: il range viene tagliato prima di essere
+        # materializzato (lo slice di un range è O(1)), quindi si allocano solo
+        # i sample_size campioni e non tutti i multipli del passo fino a end
         if sample_size >= (end - start):
-            test_numbers = list(range(start, end + 1))
+            test_numbers = range(start, end + 1)
         else:
             step = (end - start) // sample_size
-            test_numbers = list(range(start, end, step))[:sample_size]
+            test_numbers = range(start, end, step)[:sample_size]
         
-        total_time = 0
+        total_ns = 0
         errors = 0
+        rows = []
+        # Nomi globali e attributi legati a variabili locali (LOAD_FAST nel ciclo)
+        clock = time.perf_counter_ns
+        engine = next_prime_binary
+        add_row = rows.append
+        flush_rows = self.flush_rows
         
         for i, n in enumerate(test_numbers):
-            start_time = time.time()
+            t0 = clock()
             try:
-                p = next_prime_binary(n)
-                elapsed = time.time() - start_time
-                total_time += elapsed
+                p = engine(n)
+                elapsed_ns = clock() - t0
+                total_ns += elapsed_ns
                 
-                print(f"{i+1:3d}. Da {n:>10,} → {p:>10,} in {elapsed*1000:>6.2f}ms")
+                add_row(f"{i+1:3d}. Da {n:>10,} → {p:>10,} "
+                        f"in {elapsed_ns / 1e6:>6.2f}ms")
                 
             except Exception as e:
                 errors += 1
-                print(f"{i+1:3d}. ❌ Errore da {n:,}: {e}")
+                add_row(f"{i+1:3d}. ❌ Errore da {n:,}: {e}")
+            flush_rows(rows)
+        self.flush_rows(rows, force=True)
         
-        avg_time = total_time / len(test_numbers) if test_numbers else 0
+        total_time = total_ns / 1e9
+        avg_time = total_ns / len(test_numbers) / 1e9 if test_numbers else 0
         
         print("-" * 60)
         print(f"✅ Range {desc} completato!")
@@ -200,15 +391,11 @@ class PrimeTestMenu:
     
     def test_performance_specific(self):
         """Test performance su numeri specifici."""
-        self.clear_screen()
-        self.print_header()
+        self.show_screen(HEADER_TEXT)
         print("3️⃣  TEST PERFORMANCE SPECIFICO")
         print("=" * 40)
         
-        big_numbers = [
-            1000, 10000, 100000, 1000000,
-            10000000, 100000000, 1000000000
-        ]
+        big_numbers = BIG_NUMBERS
         
         print("Numeri di test predefiniti:")
         for i, num in enumerate(big_numbers, 1):
@@ -230,24 +417,53 @@ class PrimeTestMenu:
             return
         
         repeat = self.get_input("Quante volte ripetere il test", int, 3)
+        if repeat is None or repeat < 1:
+            return
+        # Le ripetizioni sono indipendenti: con più processi cambia solo il tempo
+        # totale, ogni chiamata resta cronometrata nel proprio processo
+        workers = self.get_input("Processi paralleli (0 = tutti i core)", int, 1)
+        if workers is None:
+            return
+        workers = min(workers or os.cpu_count() or 1, repeat)
         
         print(f"\n🎯 Test performance su {test_numbers[0]:,}")
         print(f"🔄 Ripetizioni: {repeat}")
         print("-" * 60)
         
         times = []
-        for test_num in test_numbers:
-            for i in range(repeat):
-                start_time = time.time()
-                p = next_prime_binary(test_num)
-                elapsed = time.time() - start_time
-                times.append(elapsed)
-                
-                print(f"Run {i+1}: {test_num:,} → {p:,} in {elapsed*1000:.3f}ms")
-        
-        avg_time = sum(times) / len(times)
-        min_time = min(times)
-        max_time = max(times)
+        rows = []
+        # Nomi globali e attributi legati a variabili locali (LOAD_FAST nel ciclo)
+        timed_next_prime = _timed_next_prime
+        add_time = times.append
+        add_row = rows.append
+        flush_rows = self.flush_rows
+        pool = ProcessPoolExecutor(workers) if workers > 1 else None
+        try:
+            for test_num in test_numbers:
+                # Riscaldamento fuori dalle misure: la prima chiamata paga la
+                # specializzazione dell'interprete e le cache fredde
+                _timed_next_prime(test_num)
+                if pool:
+                    futures = [pool.submit(_timed_next_prime, test_num)
+                               for _ in range(repeat)]
+                    results = (future.result() for future in futures)
+                else:
+                    results = (timed_next_prime(test_num) for _ in range(repeat))
+                for i, (elapsed_ns, p) in enumerate(results):
+                    # Tempi in nanosecondi interi: somma esatta, float solo in stampa
+                    add_time(elapsed_ns)
+                    
+                    add_row(f"Run {i+1}: {test_num:,} → {p:,} "
+                            f"in {elapsed_ns / 1e6:.3f}ms")
+                    flush_rows(rows)
+        finally:
+            if pool:
+                pool.shutdown()
+        self.flush_rows(rows, force=True)
+        
+        avg_time = sum(times) / len(times) / 1e9
+        min_time = min(times) / 1e9
+        max_time = max(times) / 1e9
         
         print("-" * 60)
         print(f"📊 STATISTICHE PERFORMANCE:")
@@ -259,18 +475,11 @@ class PrimeTestMenu:
     
     def test_giant_numbers(self):
         """Test numeri giganti."""
-        self.clear_screen()
-        self.print_header()
+        self.show_screen(HEADER_TEXT)
         print("8️⃣  TEST NUMERI GIGANTI (MILIARDI+)")
         print("=" * 40)
         
-        giant_numbers = [
-            ("1 Miliardo", 1_000_000_000),
-            ("10 Miliardi", 10_000_000_000),
-            ("100 Miliardi", 100_000_000_000),
-            ("1 Trilione", 1_000_000_000_000),
-            ("10 Trilioni", 10_000_000_000_000),
-        ]
+        giant_numbers = GIANT_NUMBERS
         
         print("⚠️  ATTENZIONE: I numeri molto grandi possono richiedere tempo!")
         print("\nScegli un numero gigante:")
@@ -296,9 +505,9 @@ class PrimeTestMenu:
         print("⏳ Questo potrebbe richiedere tempo...")
         
         try:
-            start_time = time.time()
+            start_time = time.perf_counter()
             p = next_prime_binary(test_num)
-            elapsed = time.time() - start_time
+            elapsed = time.perf_counter() - start_time
             
             print(f"✅ SUCCESSO!")
             print(f"   Numero di partenza: {test_num:,}")
@@ -323,66 +532,127 @@ class PrimeTestMenu:
     
     def show_results(self):
         """Mostra gli ultimi risultati."""
-        self.clear_screen()
-        self.print_header()
+        self.show_screen(HEADER_TEXT)
         print("7️⃣  ULTIMI RISULTATI")
         print("=" * 40)
         
-        if not self.results:
+        # Solo le ultime RESULTS_SHOWN righe restano in memoria
+        results = []
+        if self._results_file is not None:
+            self._results_file.flush()
+        if os.path.exists(RESULTS_FILE):
+            with open(RESULTS_FILE, newline="") as f:
+                reader = csv.reader(f)
+                next(reader, None)  # intestazione
+                results = list(deque(reader, maxlen=RESULTS_SHOWN))
+        
+        if not results:
             print("📭 Nessun risultato salvato ancora.")
             print("Esegui alcuni test per vedere i risultati qui!")
         else:
-            print(f"📊 Risultati degli ultimi {len(self.results)} test:")
+            print(f"📊 Risultati degli ultimi {len(results)} test:")
             print()
-            for i, result in enumerate(self.results, 1):
-                print(f"{i}. {result['tipo']}")
-                print(f"   Start: {result.get('start', 'N/A')}")
-                print(f"   Count: {result.get('count', 'N/A')}")
-                print(f"   Tempo totale: {result.get('tempo_totale', 0):.3f}s")
-                print(f"   Tempo medio: {result.get('tempo_medio', 0)*1000:.2f}ms")
+            for i, (tipo, start, count, total_time, avg_time) in enumerate(results, 1):
+                print(f"{i}. {tipo}")
+                print(f"   Start: {start or 'N/A'}")
+                print(f"   Count: {count or 'N/A'}")
+                print(f"   Tempo totale: {float(total_time or 0):.3f}s")
+                print(f"   Tempo medio: {float(avg_time or 0)*1000:.2f}ms")
                 print()
         
         input("📝 Premi INVIO per continuare...")
     
+    def run_script(self, module_name, args=()):
+        """
+        Esegue main() di uno script del progetto nello stesso processo, senza
+        l'avvio di un nuovo interprete; se il modulo non è importabile ripiega
+        sull'esecuzione come processo separato. Errori e interruzioni dello
+        script tornano al menu.
+        """
+        # Stato del processo che gli script modificano: binary_prime_engine_pro
+        # installa i suoi gestori di SIGINT/SIGTERM e configura il logging radice
+        signals = {sig: signal.getsignal(sig)
+                   for sig in (signal.SIGINT, signal.SIGTERM)}
+        root = logging.getLogger()
+        log_handlers, log_level = list(root.handlers), root.level
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            # Niente shell; -B evita di riscrivere i .pyc. Non si usa -S: senza
+            # site-packages il motore perderebbe gmpy2, se installato
+            subprocess.run([sys.executable, "-B", f"{module_name}.py", *args],
+                           check=False)
+            return
+        try:
+            if args:
+                module.main(list(args))
+            else:
+                module.main()
+        except KeyboardInterrupt:
+            print("\n🚫 Esecuzione interrotta dall'utente")
+        except Exception as e:
+            print(f"\n❌ Errore in {module_name}: {e}")
+        finally:
+            for sig, handler in signals.items():
+                if handler is not None:
+                    signal.signal(sig, handler)
+            for handler in root.handlers[:]:
+                if handler not in log_handlers:
+                    root.removeHandler(handler)
+                    handler.close()
+            root.setLevel(log_level)
+    
+    def run_validation(self):
+        """Opzione 4: validazione completa."""
+        print("🔄 Avviando test validazione completa...")
+        self.run_script("test_prime_validation", ["10000"])
+        input("\n📝 Premi INVIO per continuare...")
+    
+    def run_continuous(self):
+        """Opzione 5: generazione continua."""
+        print("🔄 Avviando motore continuo...")
+        from binary_prime_engine import infinite_prime_engine
+        try:
+            start = self.get_input("Numero di partenza", int, 1)
+            infinite_prime_engine(start)
+        except KeyboardInterrupt:
+            print("\n🚫 Generazione interrotta")
+        input("\n📝 Premi INVIO per continuare...")
+    
+    def run_benchmark(self):
+        """Opzione 6: benchmark."""
+        print("🔄 Avviando benchmark...")
+        self.run_script("benchmark")
+        input("\n📝 Premi INVIO per continuare...")
+    
+    def export_results(self):
+        """Opzione 9: svuota il buffer del CSV dei risultati."""
+        self.close_results()
+        print(f"💾 Risultati salvati in {RESULTS_FILE}")
+        input("📝 Premi INVIO per continuare...")
+    
     def run(self):
         """Esegue il menu principale."""
+        # Tabella delle opzioni: una ricerca nel dizionario invece di una catena di elif
+        actions = {
+            "1": self.test_custom_range,
+            "2": self.test_predefined_ranges,
+            "3": self.test_performance_specific,
+            "4": self.run_validation,
+            "5": self.run_continuous,
+            "6": self.run_benchmark,
+            "7": self.show_results,
+            "8": self.test_giant_numbers,
+            "9": self.export_results,
+        }
         while True:
-            self.clear_screen()
-            self.print_header()
-            self.print_menu()
+            self.show_screen(HEADER_TEXT, MENU_TEXT)
             
             choice = self.get_input("Scegli un'opzione (0-9)", str, "0")
             
-            if choice == "1":
-                self.test_custom_range()
-            elif choice == "2":
-                self.test_predefined_ranges()
-            elif choice == "3":
-                self.test_performance_specific()
-            elif choice == "4":
-                print("🔄 Avviando test validazione completa...")
-                os.system(f'"{sys.executable}" test_prime_validation.py 10000')
-                input("\n📝 Premi INVIO per continuare...")
-            elif choice == "5":
-                print("🔄 Avviando motore continuo...")
-                from binary_prime_engine import infinite_prime_engine
-                try:
-                    start = self.get_input("Numero di partenza", int, 1)
-                    infinite_prime_engine(start)
-                except KeyboardInterrupt:
-                    print("\n🚫 Generazione interrotta")
-                input("\n📝 Premi INVIO per continuare...")
-            elif choice == "6":
-                print("🔄 Avviando benchmark...")
-                os.system(f'"{sys.executable}" benchmark.py')
-                input("\n📝 Premi INVIO per continuare...")
-            elif choice == "7":
-                self.show_results()
-            elif choice == "8":
-                self.test_giant_numbers()
-            elif choice == "9":
-                print("💾 Export risultati non ancora implementato")
-                input("📝 Premi INVIO per continuare...")
+            action = actions.get(choice)
+            if action is not None:
+                action()
             elif choice == "0":
                 print("\n👋 Arrivederci!")
                 break
@@ -394,7 +664,10 @@ def main():
     """Funzione principale."""
     try:
         menu = PrimeTestMenu()
-        menu.run()
+        try:
+            menu.run()
+        finally:
+            menu.close_results()
     except KeyboardInterrupt:
         print("\n\n🚫 Menu interrotto dall'utente. Arrivederci!")
     except Exception as e:
@@ -9,17 +9,265 @@ import sys
 import time
 import json
 import math
+import mmap
 import random
+from array import array
+from bisect import bisect_left
+from collections import deque
+from functools import lru_cache
+from itertools import compress, count, cycle, islice
 from pathlib import Path
 from typing import List, Tuple, Dict, Optional
 from binary_prime_engine_pro import BinaryPrimeEngine
-from binary_prime_engine import binary_code, next_prime_binary
+from binary_prime_engine import (MAX_SIEVE_BASE, PRESIEVE_PRIMES, binary_code,
+                                 binary_code_ends, is_prime, next_prime_binary,
+                                 presieved_segment, segmented_prime_iter, simple_sieve,
+                                 sieve_segment)
+
+# Sieve bounds: first build covers at least SIEVE_MIN, growth stops at SIEVE_MAX
+# (odd-only bytes, so SIEVE_MAX costs SIEVE_MAX / 2 bytes of memory)
+SIEVE_MIN = 1 << 20
+SIEVE_MAX = 1 << 26
+
+# Sieve tables saved across sessions (sieve_<limit>.bin, one byte per odd number)
+SIEVE_CACHE_DIR = Path.home() / ".cache" / "prime_explorer"
+
+# The first 10 000 primes (p(10 000) = 104 729), sieved once at import and packed
+# as 32-bit words in one contiguous 40 KB buffer (a tuple would hold 10 000
+# separately allocated ints, ~360 KB scattered over the heap)
+FIRST_PRIMES = array('I', [2] + simple_sieve(104_729))
+
+# Guessing-game ranges and the primes below each, sliced once from the table
+GUESS_RANGES = (100, 1000, 10000)
+PRIMES_LT = {limit: FIRST_PRIMES[:bisect_left(FIRST_PRIMES, limit)]
+             for limit in GUESS_RANGES}
+
+# Odd primes below 1000; the first eleven (3..37) multiply to a primorial that
+# still fits in 64 bits, screened with a single gcd
+SMALL_PRIMES = FIRST_PRIMES[1:bisect_left(FIRST_PRIMES, 1000)]
+PRIMORIAL_PRIMES = SMALL_PRIMES[:11]
+PRIMORIAL = math.prod(PRIMORIAL_PRIMES)
+
+# Primality above the sieve through the engine (GMP via gmpy2 when installed,
+# deterministic Miller-Rabin otherwise), memoized for the session: games and
+# searches re-query the same large candidates (sieve lookups need no cache)
+_is_prime_large = lru_cache(maxsize=1 << 16)(is_prime)
+
+# Mod-30 wheel: residues coprime to 2·3·5 and the gap from each to the next
+WHEEL_RESIDUES = (1, 7, 11, 13, 17, 19, 23, 29)
+WHEEL = (6, 4, 2, 4, 2, 4, 6, 2)
+
+def _wheel_candidates(start: int):
+    """Yield 2, 3, 5 (if >= start), then every integer >= start coprime to 30."""
+    for p in (2, 3, 5):
+        if p >= start:
+            yield p
+    q, r = divmod(max(start, 7), 30)
+    i = bisect_left(WHEEL_RESIDUES, r)
+    current = 30 * q + WHEEL_RESIDUES[i]
+    for gap in cycle(WHEEL[i:] + WHEEL[:i]):
+        yield current
+        current += gap
+
+class _Sieve:
+    """
+    Odd-only Eratosthenes table (bits[i] is 1 iff 2i + 1 is prime), grown on demand.
+    Each build is saved under SIEVE_CACHE_DIR and memory-mapped by later sessions.
+    """
+    
+    def __init__(self):
+        self.limit = 0
+        self.bits = bytearray()
+        self._load()
+    
+    def _load(self):
+        """Map the largest table saved by an earlier session, read-only: no build."""
+        best = 0
+        for path in SIEVE_CACHE_DIR.glob("sieve_*.bin"):
+            try:
+                limit = int(path.stem[len("sieve_"):])
+                if limit > best and path.stat().st_size == (limit + 1) // 2:
+                    best, best_path = limit, path
+            except (ValueError, OSError):
+                continue
+        if best:
+            try:
+                with open(best_path, "rb") as f:
+                    self.bits = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self.limit = best
+            except (ValueError, OSError):
+                pass
+    
+    def _save(self):
+        """Save the table for later sessions, replacing smaller ones (best effort)."""
+        path = SIEVE_CACHE_DIR / f"sieve_{self.limit}.bin"
+        try:
+            SIEVE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(self.bits)
+            os.replace(tmp, path)
+        except OSError:
+            return
+        for old in SIEVE_CACHE_DIR.glob("sieve_*.bin"):
+            if old != path:
+                try:
+                    old.unlink()
+                except OSError:
+                    pass
+    
+    def ensure(self, n: int) -> bool:
+        """Make the table cover n, doubling its limit; False if n exceeds SIEVE_MAX."""
+        if n <= self.limit:
+            return True
+        if n > SIEVE_MAX:
+            return False
+        limit = max(SIEVE_MIN, self.limit)
+        while limit < n:
+            limit *= 2
+        self._build(min(limit, SIEVE_MAX))
+        return True
+    
+    def _build(self, limit: int):
+        # Odd entries up to at least limit: for an even limit (the doubled sizes
+        # from ensure) the table ends at limit + 1, so self.limit never falls
+        # below the request
+        size = limit // 2 + 1
+        limit = 2 * size - 1
+        # Start from the engine's pre-sieve pattern: multiples of 3..17 are copied
+        # in already cleared, so crossing off starts at 19
+        bits = presieved_segment(1, size)
+        bits[0] = 0
+        for i in range(PRESIEVE_PRIMES[-1] // 2 + 1, (math.isqrt(limit) + 1) // 2):
+            if bits[i]:
+                # Cross off odd multiples from p² with one slice assignment in C
+                p = 2 * i + 1
+                j = p * p // 2
+                bits[j::p] = bytes(len(range(j, size, p)))
+        self.bits = bits
+        self.limit = limit
+        self._save()
+    
+    def count(self, n: int) -> int:
+        """Odd primes up to n (covered by ensure()): set bytes counted in C."""
+        return self.bits[:(n + 1) // 2].count(1)
+    
+    def is_prime(self, n: int) -> bool:
+        """Table lookup; n must be odd and already covered by ensure()."""
+        return bool(self.bits[n >> 1])
+    
+    def prev_prime(self, n: int) -> int:
+        """Largest prime below n (2 < n, covered by ensure()), found by rfind in C."""
+        i = self.bits.rfind(b"\x01", 0, n // 2)
+        return 2 * i + 1 if i > 0 else 2
+
+# Width of the twin/cousin prime search window past the start number
+PAIR_WINDOW = 1_000_000
+
+# Result lines buffered per write when a search prints one line per hit
+PRINT_BATCH = 64
+
+# Odd numbers per segmented-sieve window: a 32 KiB bytearray stays in L1
+SEGMENT = 32 * 1024
+
+def nth_prime_pair(n: int) -> Tuple[Optional[int], int]:
+    """
+    Return (p(n-1), p(n)), with p(0) = None, counting primes window by window
+    with a segmented sieve: memory is O(√p(n)) instead of a list of n primes.
+    """
+    if n <= len(FIRST_PRIMES):
+        return (FIRST_PRIMES[n - 2] if n > 1 else None), FIRST_PRIMES[n - 1]
+    # Rosser's bound p(n) < n(ln n + ln ln n) for n >= 6 sizes the base primes
+    bound = int(n * (math.log(n) + math.log(math.log(n)))) + 1 if n >= 6 else 13
+    base_primes = simple_sieve(math.isqrt(bound))
+    zeros = memoryview(bytes(SEGMENT))
+    remaining = n - 1  # Odd primes still to count
+    previous = 2
+    lo = 3
+    while True:
+        seg = sieve_segment(lo, SEGMENT, base_primes, zeros)
+        found = seg.count(1)
+        if found >= remaining:
+            # Locate the remaining-th set entry (and the one before it) in this window
+            i = -1
+            for _ in range(remaining):
+                j, i = i, seg.find(1, i + 1)
+            if j >= 0:
+                previous = lo + 2 * j
+            return previous, lo + 2 * i
+        if found:
+            previous = lo + 2 * seg.rfind(1)
+        remaining -= found
+        lo += 2 * SEGMENT
+
+def _palindromes_from(start: int):
+    """
+    Palindromes >= start that can be prime, in increasing order: 2, 3, 5, 7, 11,
+    then odd-length palindromes mirrored from their first half. Even lengths are
+    multiples of 11, and the outer digit (equal to the last) must be 1, 3, 7 or 9.
+    """
+    for p in (2, 3, 5, 7, 11):
+        if p >= start:
+            yield p
+    for digits in count(3, 2):
+        if 10 ** digits <= start:
+            continue
+        half_digits = (digits + 1) // 2
+        unit = 10 ** (half_digits - 1)
+        # First half not below the leading digits of start (if it has this length)
+        first = start // 10 ** (digits - half_digits)
+        for lead in (1, 3, 7, 9):
+            for half in range(max(lead * unit, first), (lead + 1) * unit):
+                # Mirrored through str: both conversions run in C, while a
+                # digit-by-digit integer reversal costs three interpreted
+                # operations per digit
+                s = str(half)
+                p = int(s + s[-2::-1])
+                if p >= start:
+                    yield p
+
+# Mersenne numbers are printed in decimal only up to this exponent: int -> str is
+# quadratic, and Python 3.11+ refuses conversions past 4300 digits
+MAX_DECIMAL_BITS = 10_000
+
+def _mersenne_value(p: int) -> str:
+    """2^p - 1 in decimal with separators, or its digit count when p is too large."""
+    if p <= MAX_DECIMAL_BITS:
+        return f"{2**p - 1:,}"
+    # 2^p is never a power of 10, so 2^p - 1 has as many digits as 2^p
+    return f"<{math.floor(p * math.log10(2)) + 1:,} digits>"
+
+def lucas_lehmer(p: int) -> bool:
+    """Lucas-Lehmer test: True iff the Mersenne number 2^p - 1 is prime, for prime p."""
+    if p == 2:
+        return True  # M2 = 3; the recurrence below needs an odd p
+    m = (1 << p) - 1
+    s = 4
+    for _ in range(p - 2):
+        # Reduction mod 2^p - 1 without division: 2^p ≡ 1, so fold the high bits
+        s = s * s - 2
+        s = (s & m) + (s >> p)
+        if s >= m:
+            s -= m
+    return s == 0
+
+def count_primes_segmented(x: int) -> int:
+    """π(x) window by window with the segmented sieve, in O(√x) memory."""
+    if x < 2:
+        return 0
+    base_primes = simple_sieve(math.isqrt(x))
+    zeros = memoryview(bytes(SEGMENT))
+    count = 1  # The prime 2
+    for lo in range(3, x + 1, 2 * SEGMENT):
+        seg = sieve_segment(lo, SEGMENT, base_primes, zeros)
+        count += seg.count(1, 0, (x - lo) // 2 + 1)
+    return count
 
 class PrimeExplorer:
     """Complete prime number exploration and research tool."""
     
     def __init__(self):
         self.engine = BinaryPrimeEngine()
+        self.sieve = _Sieve()
         self.history = []
         self.favorites = set()
         self.load_favorites()
@@ -221,18 +469,7 @@ class PrimeExplorer:
             print(f"\n🔍 Searching for the previous prime before {n:,}...")
             
             start_time = time.time()
-            # Search backwards
-            candidate = n - 1 if n > 2 else 1
-            while candidate > 1:
-                if self.is_prime(candidate):
-                    prime = candidate
-                    break
-                candidate -= 1
-            else:
-                print("❌ No prime found")
-                self.pause()
-                return
-            
+            prime = self.prev_prime(n)
             elapsed = time.time() - start_time
             
             print(f"\n✅ Previous prime: {prime:,}")
@@ -263,23 +500,19 @@ class PrimeExplorer:
             print(f"\n🔍 Finding the {n:,}th prime number...")
             
             start_time = time.time()
-            primes = self.engine.generate_primes_to_count(n)
+            previous, prime = nth_prime_pair(n)
             elapsed = time.time() - start_time
             
-            if len(primes) >= n:
-                prime = primes[n-1]
-                print(f"\n✅ The {n:,}th prime: {prime:,}")
-                print(f"⏱️  Time: {elapsed:.4f} seconds")
-                print(f"🔢 Binary: {binary_code(prime)}")
-                
-                if n > 1:
-                    gap = prime - primes[n-2]
-                    print(f"📏 Gap from previous: {gap}")
-                
-                self.history.append(('nth_prime', n, prime))
-                self.offer_favorite(prime)
-            else:
-                print(f"❌ Could not generate {n} primes")
+            print(f"\n✅ The {n:,}th prime: {prime:,}")
+            print(f"⏱️  Time: {elapsed:.4f} seconds")
+            print(f"🔢 Binary: {binary_code(prime)}")
+            
+            if n > 1:
+                gap = prime - previous
+                print(f"📏 Gap from previous: {gap}")
+            
+            self.history.append(('nth_prime', n, prime))
+            self.offer_favorite(prime)
             
         except ValueError:
             print("❌ Please enter a valid number")
@@ -301,33 +534,33 @@ class PrimeExplorer:
             print(f"\n🔍 Finding primes between {start:,} and {end:,}...")
             
             start_time = time.time()
-            primes = []
-            current = max(start, 2)
-            
-            while current <= end and len(primes) < 1000:  # Limit to prevent overflow
-                if self.is_prime(current):
-                    primes.append(current)
-                current += 1
+            # Segmented sieve over [start, end] in L1-sized windows, streamed: only
+            # the first 20 and the last 10 primes are kept, whatever the range size
+            primes = segmented_prime_iter(start, SEGMENT, end + 1)
+            head = list(islice(primes, 20))
+            rest = deque(zip(count(len(head) + 1), primes), maxlen=10)
+            total = rest[-1][0] if rest else len(head)
+            tail = (head + [p for _, p in rest])[-10:]
             
             elapsed = time.time() - start_time
             
-            print(f"\n✅ Found {len(primes)} primes:")
-            if len(primes) <= 20:
-                for prime in primes:
+            print(f"\n✅ Found {total} primes:")
+            if total <= 20:
+                for prime in head:
                     print(f"  {prime:,}")
             else:
-                print(f"  First 10: {', '.join(map(str, primes[:10]))}")
-                print(f"  Last 10:  {', '.join(map(str, primes[-10:]))}")
+                print(f"  First 10: {', '.join(map(str, head[:10]))}")
+                print(f"  Last 10:  {', '.join(map(str, tail))}")
             
-            if primes:
+            if head:
                 print(f"\n📊 Statistics:")
-                print(f"  Smallest: {min(primes):,}")
-                print(f"  Largest: {max(primes):,}")
-                print(f"  Average gap: {(max(primes) - min(primes)) / max(1, len(primes) - 1):.2f}")
+                print(f"  Smallest: {head[0]:,}")
+                print(f"  Largest: {tail[-1]:,}")
+                print(f"  Average gap: {(tail[-1] - head[0]) / max(1, total - 1):.2f}")
                 
             print(f"⏱️  Time: {elapsed:.4f} seconds")
             
-            self.history.append(('range_primes', (start, end), primes))
+            self.history.append(('range_primes', (start, end), total))
             
         except ValueError:
             print("❌ Please enter valid numbers")
@@ -346,23 +579,17 @@ class PrimeExplorer:
             print(f"\n🔍 Finding {count} twin prime pairs starting from {start:,}...")
             
             start_time = time.time()
-            twin_pairs = []
-            current = max(start, 3)
-            
-            while len(twin_pairs) < count and current < start + 1000000:
-                if self.is_prime(current) and self.is_prime(current + 2):
-                    twin_pairs.append((current, current + 2))
-                current += 1
+            lowers = self.prime_pairs(start, count, 2)
             
             elapsed = time.time() - start_time
             
-            print(f"\n✅ Found {len(twin_pairs)} twin prime pairs:")
-            for i, (p1, p2) in enumerate(twin_pairs):
-                print(f"  {i+1:2d}. ({p1:,}, {p2:,})")
+            print(f"\n✅ Found {len(lowers)} twin prime pairs:")
+            for i, p1 in enumerate(lowers):
+                print(f"  {i+1:2d}. ({p1:,}, {p1 + 2:,})")
             
             print(f"⏱️  Time: {elapsed:.4f} seconds")
             
-            self.history.append(('twin_primes', start, twin_pairs))
+            self.history.append(('twin_primes', start, lowers))
             
         except ValueError:
             print("❌ Please enter valid numbers")
@@ -381,23 +608,17 @@ class PrimeExplorer:
             print(f"\n🔍 Finding {count} cousin prime pairs starting from {start:,}...")
             
             start_time = time.time()
-            cousin_pairs = []
-            current = max(start, 3)
-            
-            while len(cousin_pairs) < count and current < start + 1000000:
-                if self.is_prime(current) and self.is_prime(current + 4):
-                    cousin_pairs.append((current, current + 4))
-                current += 1
+            lowers = self.prime_pairs(start, count, 4)
             
             elapsed = time.time() - start_time
             
-            print(f"\n✅ Found {len(cousin_pairs)} cousin prime pairs:")
-            for i, (p1, p2) in enumerate(cousin_pairs):
-                print(f"  {i+1:2d}. ({p1:,}, {p2:,})")
+            print(f"\n✅ Found {len(lowers)} cousin prime pairs:")
+            for i, p1 in enumerate(lowers):
+                print(f"  {i+1:2d}. ({p1:,}, {p1 + 4:,})")
             
             print(f"⏱️  Time: {elapsed:.4f} seconds")
             
-            self.history.append(('cousin_primes', start, cousin_pairs))
+            self.history.append(('cousin_primes', start, lowers))
             
         except ValueError:
             print("❌ Please enter valid numbers")
@@ -406,6 +627,36 @@ class PrimeExplorer:
         
         self.pause()
     
+    def prime_pairs(self, start: int, count: int, gap: int):
+        """
+        Lower members p of the first count pairs (p, p + gap) of primes with
+        start <= p < start + PAIR_WINDOW. Only the lower members are stored,
+        in a flat machine-word array when they fit (no per-pair tuples).
+        """
+        lowers = array('Q') if start + PAIR_WINDOW < 1 << 64 else []
+        lo = max(start, 3) | 1
+        size = max(0, (start + PAIR_WINDOW - lo + 1) // 2)  # Odd p in the window
+        shift = gap // 2
+        top = lo + 2 * (size + shift - 1)  # Largest upper member
+        if size and self.sieve.ensure(top):
+            view = memoryview(self.sieve.bits)[lo // 2:lo // 2 + size + shift]
+        elif size and math.isqrt(top) <= MAX_SIEVE_BASE:
+            view = sieve_segment(lo, size + shift, simple_sieve(math.isqrt(top)))
+        else:
+            for current in _wheel_candidates(max(start, 3)):
+                if len(lowers) >= count or current >= start + PAIR_WINDOW:
+                    break
+                if self.is_prime(current) and self.is_prime(current + gap):
+                    lowers.append(current)
+            return lowers
+        # One sieve bitmap for the window, ANDed with itself shifted by gap/2 odd
+        # positions: set bytes mark p and p + gap both prime
+        both = (int.from_bytes(view[:size], 'big')
+                & int.from_bytes(view[shift:shift + size], 'big'))
+        flags = both.to_bytes(size, 'big')
+        lowers.extend(islice(compress(range(lo, lo + 2 * size, 2), flags), count))
+        return lowers
+    
     def offer_favorite(self, prime: int):
         """Offer to add prime to favorites."""
         if prime not in self.favorites:
@@ -426,11 +677,14 @@ class PrimeExplorer:
             return True
         if n % 2 == 0:
             return False
+        if math.gcd(n, PRIMORIAL) != 1:
+            return n in PRIMORIAL_PRIMES
+        if self.sieve.ensure(n):
+            return self.sieve.is_prime(n)
         
-        for i in range(3, int(n**0.5) + 1, 2):
-            if n % i == 0:
-                return False
-        return True
+        # Beyond the sieve: the engine's test (gmpy2 or Miller-Rabin), O(log n)
+        # modpows instead of O(√n) trial divisions
+        return _is_prime_large(n)
     
     # =================================================================
     # CALCULATIONS MENU - IMPLEMENTED
@@ -529,22 +783,22 @@ class PrimeExplorer:
             
             print(f"\n🔍 Finding prime pairs that sum to {n:,}...")
             
-            pairs = []
-            for p1 in range(2, n // 2 + 1):
-                if self.is_prime(p1):
-                    p2 = n - p1
-                    if self.is_prime(p2):
-                        pairs.append((p1, p2))
-            
-            if pairs:
-                print(f"\n✅ Found {len(pairs)} prime pairs:")
-                for i, (p1, p2) in enumerate(pairs[:10], 1):  # Show first 10
-                    print(f"  {i:2d}. {p1:,} + {p2:,} = {n:,}")
-                
-                if len(pairs) > 10:
-                    print(f"  ... and {len(pairs) - 10} more pairs")
-                
+            # Confirmation needs a single pair; the full list is computed on demand
+            first = self.goldbach_first_pair(n)
+            
+            if first:
+                p1, p2 = first
+                print(f"\n✅ Smallest pair: {p1:,} + {p2:,} = {n:,}")
                 print(f"\n🎯 Goldbach's conjecture confirmed for {n:,}!")
+                
+                if input("\n📋 List all prime pairs? (y/n): ").strip().lower() == 'y':
+                    pairs = self.goldbach_pairs(n)
+                    print(f"\n✅ Found {len(pairs)} prime pairs:")
+                    for i, (p1, p2) in enumerate(pairs[:10], 1):  # Show first 10
+                        print(f"  {i:2d}. {p1:,} + {p2:,} = {n:,}")
+                    
+                    if len(pairs) > 10:
+                        print(f"  ... and {len(pairs) - 10} more pairs")
             else:
                 print(f"\n❌ No prime pairs found! (This would disprove Goldbach's conjecture)")
             
@@ -555,6 +809,58 @@ class PrimeExplorer:
         
         self.pause()
     
+    def prev_prime(self, n: int) -> int:
+        """Largest prime below n, for n > 2."""
+        if self.sieve.ensure(n):
+            return self.sieve.prev_prime(n)
+        # Beyond the sieve: odd candidates downwards, each tested by the engine
+        candidate = (n - 2) | 1
+        while not self.is_prime(candidate):
+            candidate -= 2
+        return candidate
+    
+    def goldbach_first_pair(self, n: int) -> Optional[Tuple[int, int]]:
+        """Pair (p1, n - p1) with the smallest prime p1, for even n > 2, or None."""
+        # Walk the embedded table first: the smallest p1 is tiny in practice
+        for p1 in FIRST_PRIMES:
+            if p1 > n // 2:
+                return None
+            if self.is_prime(n - p1):
+                return p1, n - p1
+        p1 = next_prime_binary(FIRST_PRIMES[-1] + 1)
+        while p1 <= n // 2:
+            if self.is_prime(n - p1):
+                return p1, n - p1
+            p1 = next_prime_binary(p1 + 1)
+        return None
+    
+    def goldbach_pairs(self, n: int) -> List[Tuple[int, int]]:
+        """All prime pairs (p1, p2) with p1 <= p2 and p1 + p2 = n, for even n > 2."""
+        pairs = [(2, 2)] if n == 4 else []
+        if not self.sieve.ensure(n):
+            for p1 in range(3, n // 2 + 1, 2):
+                if self.is_prime(p1) and self.is_prime(n - p1):
+                    pairs.append((p1, n - p1))
+            return pairs
+        # Odd p1 = 2i + 1 pairs with n - p1 at index n/2 - 1 - i: the forward and the
+        # reversed slice of the sieve are ANDed as two big integers, in C
+        half = n // 2
+        count = (half - 1) // 2
+        bits = self.sieve.bits
+        both = int.from_bytes(bits[1:count + 1], 'big') & \
+            int.from_bytes(bits[half - 2:half - 2 - count:-1], 'big')
+        pairs.extend((p1, n - p1) for p1 in
+                     compress(range(3, 2 * count + 2, 2), both.to_bytes(count, 'big')))
+        return pairs
+    
+    def count_primes(self, x: int) -> int:
+        """π(x): count of set bytes in the sieve table, one C call, no Python loop."""
+        if x < 2:
+            return 0
+        if self.sieve.ensure(x):
+            return 1 + self.sieve.count(x)
+        return count_primes_segmented(x)
+    
     def prime_counting(self):
         """Count primes up to a given number."""
         self.print_header("PRIME COUNTING FUNCTION π(x)")
@@ -564,10 +870,7 @@ class PrimeExplorer:
             print(f"\n🔍 Counting primes up to {x:,}...")
             
             start_time = time.time()
-            count = 0
-            for i in range(2, x + 1):
-                if self.is_prime(i):
-                    count += 1
+            count = self.count_primes(x)
             elapsed = time.time() - start_time
             
             # Prime Number Theorem approximation
@@ -635,8 +938,8 @@ class PrimeExplorer:
         print("🎯 I'm thinking of a prime number. Can you guess it?")
         
         # Generate random prime in range
-        range_max = random.choice([100, 1000, 10000])
-        target_prime = random.choice([p for p in range(2, range_max) if self.is_prime(p)])
+        range_max = random.choice(GUESS_RANGES)
+        target_prime = random.choice(PRIMES_LT[range_max])
         
         print(f"🔢 The prime is between 2 and {range_max:,}")
         print("💡 Hints: Enter a number and I'll tell you if it's higher or lower")
@@ -778,28 +1081,30 @@ class PrimeExplorer:
         print("   where n is also prime.\n")
         
         try:
-            max_n = int(input("Enter maximum exponent to check (recommended ≤ 20): "))
+            max_n = int(input("Enter maximum exponent to check (recommended ≤ 3000): "))
             
             print(f"\n🔍 Searching for Mersenne primes with n ≤ {max_n}...")
             
             mersenne_primes = []
             
             for n in range(2, max_n + 1):
-                if self.is_prime(n):  # n must be prime
+                if self.is_prime(n) and lucas_lehmer(n):  # n must be prime
                     mersenne_candidate = 2**n - 1
-                    if mersenne_candidate < 2**31:  # Practical limit
-                        if self.is_prime(mersenne_candidate):
-                            mersenne_primes.append((n, mersenne_candidate))
-                            print(f"  ✅ M{n} = 2^{n} - 1 = {mersenne_candidate:,}")
+                    mersenne_primes.append((n, mersenne_candidate))
+                    print(f"  ✅ M{n} = 2^{n} - 1 = {_mersenne_value(n)}")
             
             print(f"\n📊 Found {len(mersenne_primes)} Mersenne primes")
             
             if mersenne_primes:
                 largest_n, largest_prime = mersenne_primes[-1]
-                print(f"🏆 Largest found: M{largest_n} = {largest_prime:,}")
-                print(f"🔢 Binary: {binary_code(largest_prime)}")
-                
-                self.offer_favorite(largest_prime)
+                print(f"🏆 Largest found: M{largest_n} = {_mersenne_value(largest_n)}")
+                if largest_n <= MAX_DECIMAL_BITS:
+                    print(f"🔢 Binary: {binary_code(largest_prime)}")
+                    # Favorites are stored as decimal JSON, so only printable primes
+                    self.offer_favorite(largest_prime)
+                else:
+                    head, tail, bits = binary_code_ends(largest_prime)
+                    print(f"🔢 Binary: {head}...{tail} ({bits} bits)")
             
         except ValueError:
             print("❌ Please enter a valid number")
@@ -820,15 +1125,24 @@ class PrimeExplorer:
             print(f"\n🔍 Finding {count} palindromic primes starting from {start:,}...")
             
             palindromic_primes = []
-            current = max(start, 2)
+            # Hits are written in blocks of PRINT_BATCH lines, not one write each
+            lines = []
             
-            while len(palindromic_primes) < count and current < start + 1000000:
-                if self.is_prime(current):
-                    str_num = str(current)
-                    if str_num == str_num[::-1]:  # Check if palindrome
-                        palindromic_primes.append(current)
-                        print(f"  {len(palindromic_primes):2d}. {current:,}")
-                current += 1
+            try:
+                # Only palindromes are generated and tested, never every integer;
+                # filter and islice keep the test and the stop condition out of
+                # the loop body
+                candidates = _palindromes_from(start)
+                hits = islice(filter(self.is_prime, candidates), max(count, 0))
+                for found, palindrome in enumerate(hits, 1):
+                    palindromic_primes.append(palindrome)
+                    lines.append(f"  {found:2d}. {palindrome:,}")
+                    if len(lines) >= PRINT_BATCH:
+                        sys.stdout.write("\n".join(lines) + "\n")
+                        lines.clear()
+            finally:
+                if lines:
+                    sys.stdout.write("\n".join(lines) + "\n")
             
             print(f"\n✅ Found {len(palindromic_primes)} palindromic primes")
             
@@ -867,8 +1181,7 @@ class PrimeExplorer:
         # Offer to add to favorites
         print(f"\n💝 Add Fermat primes to favorites?")
         if input("(y/n): ").strip().lower() == 'y':
-            for _, prime in known_fermat:
-                self.favorites.add(prime)
+            self.favorites.update(prime for _, prime in known_fermat)
             print("✅ All Fermat primes added to favorites!")
         
         self.pause()
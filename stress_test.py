@@ -6,26 +6,150 @@ Testa performance e correttezza con numeri sempre più grandi.
 
 import time
 import sys
+from array import array
+from math import isqrt
 from binary_prime_engine import next_prime_binary, binary_code
+from binary_prime_engine import is_prime_mr as engine_is_prime_mr
+
+# Basi Miller-Rabin di riferimento: i primi fino a 41 rendono il test deterministico
+# per n < 3.3·10^24. Implementazione separata da quella del motore, che sotto 2^64
+# usa altri testimoni: il controllo resta indipendente
+MR_REFERENCE_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+# Valori oltre 3.3·10^24, dove il motore passa da Miller-Rabin a 13 basi a BPSW.
+# Primi di Mersenne 2^p - 1, verificati qui con Lucas-Lehmer (indipendente dal motore)
+BPSW_MERSENNE_EXPONENTS = (89, 107, 127)
+# Pseudoprimi forti in base 2 con la loro fattorizzazione: Mersenne composti con
+# esponente primo e F7 = 2^128 + 1. Superano Miller-Rabin in base 2 e nessun fattore
+# è sotto 1021, quindi solo il test di Lucas forte del motore può scartarli
+BPSW_PSEUDOPRIMES = (
+    (2**97 - 1, 11447, 13842607235828485645766393),
+    (2**101 - 1, 7432339208719, 341117531003194129),
+    (2**103 - 1, 2550183799, 3976656429941438590393),
+    (2**109 - 1, 745988807, 870035986098720987332873),
+    (2**128 + 1, 59649589127497217, 5704689200685129054721),
+)
+
+# Sotto questa soglia la trial division costa poco (al più 6542 divisioni)
+TRIAL_DIVISION_LIMIT = 1 << 32
+
+def odd_primes_up_to(limit):
+    """
+    Primi dispari fino a limit con il crivello di Eratostene sui soli dispari
+    (small[i] ↔ 2i + 1). Un cursore salta al prossimo primo con find in C,
+    senza riscandire in Python ogni dispari fino al limite.
+    """
+    small = bytearray(b"\x01") * ((max(limit, 0) + 1) // 2)
+    primes = []
+    i = small.find(1, 1)
+    while i != -1:
+        p = 2 * i + 1
+        primes.append(p)
+        j = p * p // 2
+        if j < len(small):
+            small[j::p] = bytes(len(range(j, len(small), p)))
+        i = small.find(1, i + 1)
+    return primes
+
+# Divisori della trial division: i primi dispari fino a √TRIAL_DIVISION_LIMIT,
+# calcolati una volta sola (≈ 6500 invece di ≈ 22000 candidati 6k±1)
+TRIAL_PRIMES = tuple(odd_primes_up_to(isqrt(TRIAL_DIVISION_LIMIT)))
+
+def is_prime_mr(n, bases=MR_REFERENCE_BASES):
+    """Miller-Rabin di riferimento (basi di default: esatto per n < 3.3·10^24)."""
+    if n < 2:
+        return False
+    for p in bases:
+        if n % p == 0:
+            return n == p
+    
+    # n-1 = d·2^s con d dispari
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    
+    for a in bases:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
 
 def is_prime_reference(n):
-    """Funzione di riferimento ottimizzata per verificare se un numero è primo."""
+    """Funzione di riferimento: trial division per n piccoli, Miller-Rabin oltre."""
+    if n >= TRIAL_DIVISION_LIMIT:
+        # La trial division sarebbe O(√n): ~10^6 divisioni già a 10^12
+        return is_prime_mr(n)
     if n < 2:
         return False
-    if n == 2:
-        return True
     if n % 2 == 0:
-        return False
+        return n == 2
     
-    # Ottimizzazione: controlla solo fino alla radice quadrata
-    limit = int(n**0.5) + 1
-    for i in range(3, limit, 2):
-        if n % i == 0:
+    # Ottimizzazione: controlla solo fino alla radice quadrata, e solo i divisori primi
+    limit = isqrt(n)
+    for p in TRIAL_PRIMES:
+        if p > limit:
+            return True
+        if n % p == 0:
             return False
     return True
 
-def stress_test_range(start, end, sample_size=100):
-    """Testa un range di numeri con campionamento."""
+# Ruota modulo 30 ({2, 3, 5}): residui coprimi con 30 e, per ogni residuo,
+# distanza dal prossimo candidato della ruota
+WHEEL30 = (1, 7, 11, 13, 17, 19, 23, 29)
+WHEEL30_SKIP = tuple(min((w - r) % 30 for w in WHEEL30) for r in range(30))
+
+def wheel30_snap(n):
+    """Primo candidato ≥ n senza fattori 2, 3, 5 (n > 5): stesso primo successivo."""
+    return n + WHEEL30_SKIP[n % 30]
+
+def segmented_sieve(lo, hi, segment_size=1 << 20):
+    """
+    Crivello di riferimento, indipendente dal motore, sui dispari in [lo, hi].
+    Restituisce (base, sieve): sieve[i] vale 1 se il dispari base + 2i è primo.
+    """
+    base = lo | 1
+    size = max(0, (hi - base) // 2 + 1)
+    sieve = bytearray(b"\x01") * size
+    if base == 1 and size:
+        sieve[0] = 0
+    
+    # Primi dispari fino a √hi
+    small_primes = odd_primes_up_to(isqrt(max(hi, 0)))
+    
+    # Cancellazione a segmenti di segment_size dispari (1 MiB, nella cache L2: in Python
+    # segmenti più piccoli moltiplicano i cicli interpretati sui primi base).
+    # Ogni cancellazione è una scrittura a passo p in C da un buffer di zeri preallocato
+    zeros = memoryview(bytes(segment_size))
+    for seg_lo in range(0, size, segment_size):
+        seg_hi = min(seg_lo + segment_size, size)
+        n_lo = base + 2 * seg_lo
+        n_hi = base + 2 * (seg_hi - 1)
+        for p in small_primes:
+            if p * p > n_hi:
+                break
+            # Primo multiplo dispari di p nel segmento (mai p stesso)
+            m = max(p * p, (n_lo + p - 1) // p * p)
+            if m % 2 == 0:
+                m += p
+            j = (m - base) // 2
+            if j < seg_hi:
+                sieve[j:seg_hi:p] = zeros[:(seg_hi - 1 - j) // p + 1]
+    return base, sieve
+
+def stress_test_range(start, end, sample_size=100, reference=None):
+    """
+    Testa un range di numeri con campionamento.
+    reference: coppia (base, sieve) di segmented_sieve già calcolata che copre il range,
+    per riusare un unico crivello su più range adiacenti.
+    """
     print(f"\n=== TEST RANGE {start:,} - {end:,} ===")
     
     # Campiona alcuni numeri dal range
@@ -33,23 +157,53 @@ def stress_test_range(start, end, sample_size=100):
     test_numbers = list(range(start, min(end + 1, start + step * sample_size), step))
     
     errors = []
-    times = []
+    # Tempi in nanosecondi interi in un array preallocato
+    times = array('q', bytes(8 * len(test_numbers)))
+    primes = [0] * len(test_numbers)
     
-    for n in test_numbers:
-        start_time = time.time()
-        
+    # Ciclo di campionamento ridotto all'essenziale: una sola lettura dell'orologio
+    # per campione (la fine di un campione è l'inizio del successivo) e funzioni
+    # legate a variabili locali, così l'overhead resta trascurabile anche quando
+    # il motore impiega pochi µs
+    clock = time.perf_counter_ns
+    engine = next_prime_binary
+    t0 = clock()
+    for i, n in enumerate(test_numbers):
         # Trova il prossimo primo dal motore
-        engine_prime = next_prime_binary(n)
-        
-        elapsed = time.time() - start_time
-        times.append(elapsed)
-        
-        # Verifica con funzione di riferimento
-        if not is_prime_reference(engine_prime):
-            errors.append((n, engine_prime))
+        primes[i] = engine(n)
+        t1 = clock()
+        times[i] = t1 - t0
+        t0 = t1
+    results = list(zip(test_numbers, primes))
+    
+    # Verifica con un unico crivello di riferimento sull'intero range: ogni controllo
+    # è una lettura O(1) invece di una trial division O(√n)
+    if results:
+        top = max(primes)
+        if reference is not None and reference[0] <= test_numbers[0] and \
+                top <= reference[0] + 2 * (len(reference[1]) - 1):
+            base, sieve = reference
+        else:
+            base, sieve = segmented_sieve(test_numbers[0], top)
+        # Metodi legati a variabili locali: niente LOAD_ATTR a ogni campione
+        find = sieve.find
+        add_error = errors.append
+        for n, engine_prime in results:
+            if engine_prime == 2:
+                correct = n <= 2
+            else:
+                # Il motore deve trovare il primo dispari primo >= n (> n per n = 2):
+                # una sola ricerca in C (find) a partire dal candidato della ruota 30
+                # (sopra 5 nessun primo è tra n e lo snap); il motore riceve n intatto
+                first = (max(wheel30_snap(n) if n > 5 else n | 1, base) - base) // 2
+                offset = engine_prime - base
+                correct = (offset >= 0 and offset % 2 == 0
+                           and find(1, first) == offset // 2)
+            if not correct:
+                add_error((n, engine_prime))
     
-    avg_time = sum(times) / len(times) if times else 0
-    max_time = max(times) if times else 0
+    avg_time = sum(times) / len(times) / 1e9 if times else 0
+    max_time = max(times) / 1e9 if times else 0
     
     print(f"Numeri testati: {len(test_numbers)}")
     print(f"Errori trovati: {len(errors)}")
@@ -70,9 +224,9 @@ def performance_test(numbers_to_test):
     for n in numbers_to_test:
         print(f"\nTesting from {n:,}:")
         
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         prime = next_prime_binary(n)
-        elapsed = time.time() - start_time
+        elapsed = (time.perf_counter_ns() - start_time) / 1e9
         
         # Verifica correttezza
         is_correct = is_prime_reference(prime)
@@ -85,6 +239,46 @@ def performance_test(numbers_to_test):
         if not is_correct:
             print(f"  ❌ ERRORE: {prime} NON è primo!")
 
+def lucas_lehmer(p):
+    """Test di Lucas-Lehmer: per p primo dispari, 2^p - 1 è primo sse s(p-2) ≡ 0."""
+    m = (1 << p) - 1
+    s = 4
+    for _ in range(p - 2):
+        s = (s * s - 2) % m
+    return s == 0
+
+def bpsw_test():
+    """Test del ramo BPSW del motore (n > 3.3·10^24) su primi e pseudoprimi noti."""
+    print(f"\n=== TEST BPSW (n > 3.3·10^24) ===")
+    
+    errors = []
+    for p in BPSW_MERSENNE_EXPONENTS:
+        n = (1 << p) - 1
+        if not lucas_lehmer(p):
+            errors.append(f"2^{p} - 1 non è un primo di Mersenne")
+        elif not engine_is_prime_mr(n):
+            errors.append(f"2^{p} - 1 scartato dal motore")
+        elif next_prime_binary(n - 1) != n:
+            errors.append(f"next_prime_binary(2^{p} - 2) ≠ 2^{p} - 1")
+    
+    for n, a, b in BPSW_PSEUDOPRIMES:
+        # Il caso è valido solo se n è composto e supera Miller-Rabin in base 2
+        if a * b != n or not is_prime_mr(n, (2,)):
+            errors.append(f"{n} non è uno pseudoprimo forte in base 2")
+        elif engine_is_prime_mr(n):
+            errors.append(f"{n} = {a} × {b} accettato come primo")
+    
+    total = len(BPSW_MERSENNE_EXPONENTS) + len(BPSW_PSEUDOPRIMES)
+    print(f"Valori testati: {total}")
+    print(f"Errori trovati: {len(errors)}")
+    
+    if errors:
+        for error in errors:
+            print(f"❌ {error}")
+        return False
+    print("✅ Primi accettati e pseudoprimi scartati!")
+    return True
+
 def find_reliability_limit():
     """Trova il limite di affidabilità del motore."""
     print("=== RICERCA LIMITE DI AFFIDABILITÀ ===")
@@ -101,9 +295,13 @@ def find_reliability_limit():
     
     reliable_up_to = 0
     
+    # Un solo crivello di riferimento per tutti i range, con un margine oltre l'ultimo
+    # estremo per il primo successivo (i gap sotto 10^7 restano sotto 200)
+    reference = segmented_sieve(1, test_ranges[-1][1] + 1000)
+    
     for start, end in test_ranges:
         print(f"\n{'='*60}")
-        success = stress_test_range(start, end, sample_size=50)
+        success = stress_test_range(start, end, sample_size=50, reference=reference)
         
         if success:
             reliable_up_to = end
@@ -134,10 +332,13 @@ def main():
     
     performance_test(big_numbers)
     
-    # Test 3: Primi molto grandi (se il sistema regge)
+    # Test 3: Primi molto grandi, oltre la soglia di Miller-Rabin deterministico
+    bpsw_ok = bpsw_test()
+    
     print(f"\n{'='*60}")
     print("=== CONCLUSIONI ===")
     print(f"🎯 Motore affidabile fino a: {limit:,}")
+    print(f"🎯 Ramo BPSW (n > 3.3·10^24): {'corretto' if bpsw_ok else 'ERRORI'}")
     
     if limit >= 1_000_000:
         print("🏆 ECCELLENTE: Affidabile per numeri fino a milioni!")
@@ -5,13 +5,40 @@ Test dei Limiti Binari del Binary Prime Engine
 Documenta fino a quanti bit il motore può funzionare praticamente.
 """
 
+import os
+import sys
 import time
-from binary_prime_engine import next_prime_binary, binary_code
+from concurrent.futures import ProcessPoolExecutor
+from binary_prime_engine import gmpy2, next_prime_binary, binary_code_ends
 
-def test_bit_limits():
-    """Testa i limiti pratici del motore in termini di bit."""
+# Soglie di tempo (secondi, esclusive) e relativa valutazione di ogni riga
+STATUS_TABLE = (
+    (1, "🚀 Veloce"),
+    (10, "⚡ Buono"),
+    (60, "🐌 Lento"),
+    (float("inf"), "🛑 Troppo lento"),
+)
+
+def _timed_next_prime(n):
+    """Unità di lavoro: (primo, secondi), cronometrata nel processo che la esegue."""
+    start_time = time.perf_counter()
+    prime = next_prime_binary(n)
+    return prime, time.perf_counter() - start_time
+
+def test_bit_limits(workers=1):
+    """
+    Testa i limiti pratici del motore in termini di bit.
+    Le righe sono indipendenti: con workers > 1 (0 = tutti i core) vengono
+    calcolate in parallelo da processi separati, ognuna cronometrata nel suo.
+    Il default è seriale: ogni riga richiede meno di 1 ms e l'avvio del pool
+    costerebbe più del test; con il pool lo stop a 60 s annulla le righe non
+    ancora avviate, ma quelle in corso terminano nei loro processi.
+    """
     print("🔬 TEST LIMITI BINARI - BINARY PRIME ENGINE")
     print("=" * 70)
+    # Il motore passa a GMP da solo quando gmpy2 è installato: i tempi ne dipendono
+    backend = "GMP (gmpy2)" if gmpy2 is not None else "Miller-Rabin/BPSW in Python"
+    print(f"Backend di primalità: {backend}\n")
     
     # Test progressivi per bit
     bit_tests = [
@@ -26,29 +53,30 @@ def test_bit_limits():
     ]
     
     results = []
+    # Le righe della tabella vengono scritte con una sola write a fine ciclo
+    lines = [f"{'Bit':>3} | {'Numero (~)':>15} | {'Primo Trovato':>20} | "
+             f"{'Tempo':>8} | {'Status'}",
+             "-" * 75]
     
-    print(f"{'Bit':>3} | {'Numero (~)':>15} | {'Primo Trovato':>20} | {'Tempo':>8} | {'Status'}")
-    print("-" * 75)
+    workers = min(workers or os.cpu_count() or 1, len(bit_tests))
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    futures = ([pool.submit(_timed_next_prime, n) for _, n, _ in bit_tests]
+               if pool else [])
     
-    for target_bits, start_num, description in bit_tests:
+    for i, (target_bits, start_num, description) in enumerate(bit_tests):
         try:
-            start_time = time.time()
-            prime = next_prime_binary(start_num)
-            elapsed = time.time() - start_time
+            if pool:
+                prime, elapsed = futures[i].result()
+            else:
+                prime, elapsed = _timed_next_prime(start_num)
             
             actual_bits = prime.bit_length()
             
             # Determina status basato sul tempo
-            if elapsed < 1:
-                status = "🚀 Veloce"
-            elif elapsed < 10:
-                status = "⚡ Buono"
-            elif elapsed < 60:
-                status = "🐌 Lento"
-            else:
-                status = "🛑 Troppo lento"
+            status = next(label for limit, label in STATUS_TABLE if elapsed < limit)
             
-            print(f"{actual_bits:>3} | {description:>15} | {prime:>20,} | {elapsed:>7.2f}s | {status}")
+            lines.append(f"{actual_bits:>3} | {description:>15} | {prime:>20,} | "
+                         f"{elapsed:>7.2f}s | {status}")
             
             results.append({
                 'bits': actual_bits,
@@ -59,16 +87,25 @@ def test_bit_limits():
             
             # Fermati se diventa impraticabile
             if elapsed > 60:
-                print(f"\n⚠️  Fermandosi qui: tempo eccessivo ({elapsed:.1f}s)")
+                lines.append(f"\n⚠️  Fermandosi qui: tempo eccessivo ({elapsed:.1f}s)")
                 break
                 
         except KeyboardInterrupt:
-            print(f"\n🚫 Test interrotto dall'utente")
+            lines.append(f"\n🚫 Test interrotto dall'utente")
             break
         except Exception as e:
-            print(f"{target_bits:>3} | {description:>15} | ❌ ERRORE: {str(e)[:20]}")
+            lines.append(f"{target_bits:>3} | {description:>15} | "
+                         f"❌ ERRORE: {str(e)[:20]}")
             break
     
+    if pool:
+        # Stop anticipato: le righe non ancora avviate si annullano (a mano:
+        # cancel_futures di shutdown esiste solo da Python 3.9)
+        for future in futures:
+            future.cancel()
+        pool.shutdown(wait=False)
+    sys.stdout.write("\n".join(lines) + "\n")
+    
     # Analisi risultati
     print(f"\n{'='*70}")
     print("📊 ANALISI LIMITI:")
@@ -107,20 +144,23 @@ def demo_binary_representation():
         print(f"\n📍 {label} prime example:")
         try:
             prime = next_prime_binary(start)
-            binary = binary_code(prime)
-            bits = len(binary)
+            # Solo le prime e le ultime 20 cifre: la stringa completa non si costruisce
+            head, tail, bits = binary_code_ends(prime, 20)
             
             print(f"  Number: {prime:,}")
             print(f"  Bits: {bits}")
-            print(f"  Binary: {binary[:20]}...{binary[-20:]} (showing first/last 20)")
-            print(f"  Full length: {len(binary)} characters")
+            print(f"  Binary: {head}...{tail} (showing first/last 20)")
+            print(f"  Full length: {bits} characters")
             
         except Exception as e:
             print(f"  ❌ Error: {e}")
 
-def main():
-    """Funzione principale del test."""
-    test_bit_limits()
+def main(argv=None):
+    """Funzione principale del test; argv come sys.argv[1:] (workers opzionale)."""
+    if argv is None:
+        argv = sys.argv[1:]
+    # Uso: test_bit_limits.py [workers]  (0 = tutti i core)
+    test_bit_limits(int(argv[0]) if argv else 1)
     demo_binary_representation()
     
     print(f"\n{'='*70}")
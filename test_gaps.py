@@ -3,29 +3,24 @@
 Test rapido per mostrare alcuni primi con i loro gap.
 """
 
-from binary_prime_engine import next_prime_binary, binary_code
+from itertools import islice
+from binary_prime_engine import segmented_prime_iter, binary_code
 
 def show_primes_with_gaps(start=1, count=20):
     """Mostra i primi numeri primi con gap e codici binari."""
-    print(f"=== PRIMI CON GAP E CODICI BINARI (da {start}, {count} primi) ===\n")
+    # Generazione in blocco con il crivello segmentato del motore
+    primes = list(islice(segmented_prime_iter(start), count))
+    # gap = 0 per il primo della sequenza
+    gaps = [0] + [b - a for a, b in zip(primes, primes[1:])]
     
-    n = start
-    last_prime = None
-    
-    for i in range(count):
-        p = next_prime_binary(n)
-        
-        if last_prime is None:
-            gap = 0
-        else:
-            gap = p - last_prime
-            
-        bin_code = binary_code(p, 12)  # 12 bit per compattezza
-        
-        print(f"p{i+1:2d} = {p:4d} | gap = {gap:2d} | bin: {bin_code}")
-        
-        last_prime = p
-        n = p + 1
+    # Un'unica stringa per tutte le righe, scritta con una sola print
+    lines = [f"=== PRIMI CON GAP E CODICI BINARI (da {start}, {count} primi) ===\n"]
+    # 12 bit per compattezza
+    lines.extend(
+        f"p{i+1:2d} = {p:4d} | gap = {gap:2d} | bin: {binary_code(p, 12)}"
+        for i, (p, gap) in enumerate(zip(primes, gaps))
+    )
+    print("\n".join(lines))
 
 if __name__ == "__main__":
     show_primes_with_gaps(1, 30)
@@ -3,8 +3,41 @@
 Test di validazione per verificare che il motore generi solo numeri primi corretti.
 """
 
+import os
 import sys
-from binary_prime_engine import next_prime_binary
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import compress, islice
+from math import isqrt, log
+from operator import lt
+from pathlib import Path
+from binary_prime_engine import next_prime_binary, segmented_prime_iter
+
+# Tabella di riferimento salvata tra un'esecuzione e l'altra (uint64 grezzi):
+# si conserva solo la più grande, che copre anche ogni limite inferiore
+REFERENCE_CACHE_DIR = Path.home() / ".cache" / "binary_prime_engine"
+# Fino a questo limite il crivello (~60 ms a 10^6) costa meno di leggere e
+# verificare la tabella salvata: il disco si usa solo oltre
+REFERENCE_CACHE_MIN = 10**6
+# π(x) noti: una tabella salvata deve riprodurli esattamente
+KNOWN_PRIME_COUNTS = {10**7: 664579, 10**8: 5761455, 10**9: 50847534}
+
+# Divisori della funzione di riferimento: primi dispari trovati per trial division
+# sui primi già noti, estesi solo quando serve (indipendenti dal motore)
+_ODD_PRIMES = [3]
+
+def _extend_odd_primes(limit):
+    """Estende _ODD_PRIMES fino al primo dispari >= limit."""
+    c = _ODD_PRIMES[-1]
+    while c < limit:
+        c += 2
+        for p in _ODD_PRIMES:
+            if p * p > c:
+                _ODD_PRIMES.append(c)
+                break
+            if c % p == 0:
+                break
 
 def is_prime_reference(n):
     """Funzione di riferimento per verificare se un numero è primo."""
@@ -15,45 +48,151 @@ def is_prime_reference(n):
     if n % 2 == 0:
         return False
     
-    for i in range(3, int(n**0.5) + 1, 2):
-        if n % i == 0:
+    # Solo divisori primi fino a √n: ~√n / ln √n divisioni invece di √n / 2
+    root = isqrt(n)
+    if _ODD_PRIMES[-1] < root:
+        _extend_odd_primes(root)
+    for p in _ODD_PRIMES:
+        if p > root:
+            return True
+        if n % p == 0:
+            return False
+    return True
+
+# Voci della tabella di riferimento ricontrollate una per una con is_prime_reference
+SPOT_CHECKS = 64
+
+def _spot_check(primes, limit):
+    """
+    Ricontrolla la tabella con is_prime_reference, indipendente da ogni crivello, in
+    SPOT_CHECKS punti sparsi (sempre il primo e l'ultimo): la voce deve essere prima
+    e nessun numero fino alla successiva (o fino a limit, dopo l'ultima) può esserlo.
+    """
+    n = len(primes)
+    if not n:
+        return limit < 2
+    if primes[0] != 2:
+        return False
+    for i in {*range(0, n, max(1, n // SPOT_CHECKS)), n - 1}:
+        p = primes[i]
+        upper = primes[i + 1] if i + 1 < n else limit + 1
+        if not is_prime_reference(p):
+            return False
+        if any(map(is_prime_reference, range(p + 1, upper))):
             return False
     return True
 
+def _prime_count_bounds(x):
+    """
+    Limiti di Dusart per π(x), x >= 599:
+    x/ln x·(1 + 1/ln x) <= π(x) <= 1.25506·x/ln x.
+    """
+    ln = log(x)
+    return int(x / ln * (1 + 1 / ln)), int(1.25506 * x / ln) + 1
+
+def _load_reference(limit):
+    """
+    Primi fino a limit dalla tabella salvata, se ne copre il limite e supera le
+    verifiche; altrimenti None. Si legge solo il prefisso che può servire a limit.
+    """
+    low, high = _prime_count_bounds(limit)
+    for path in REFERENCE_CACHE_DIR.glob("ref_primes_*.bin"):
+        try:
+            if int(path.stem[len("ref_primes_"):]) < limit:
+                continue
+            with open(path, "rb") as f:
+                data = f.read(8 * high)
+            primes = array('Q')
+            # Nessun parsing: i byte sono già gli uint64 della tabella
+            primes.frombytes(data)
+        except (ValueError, OSError):
+            continue
+        primes = primes[:bisect_right(primes, limit)]
+        # Una tabella vecchia o danneggiata non deve diventare l'oracolo: conteggio
+        # (esatto se noto), ordine strettamente crescente e controllo a campione
+        count = len(primes)
+        if (KNOWN_PRIME_COUNTS.get(limit, count) == count and low <= count <= high
+                and all(map(lt, primes, islice(primes, 1, None)))
+                and _spot_check(primes, limit)):
+            return primes
+    return None
+
+def _save_reference(limit, primes):
+    """Salva la tabella per i prossimi avvii, sostituendo le altre (best effort)."""
+    path = REFERENCE_CACHE_DIR / f"ref_primes_{limit}.bin"
+    try:
+        REFERENCE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(primes.tobytes())
+        os.replace(tmp, path)
+    except OSError:
+        return
+    for old in REFERENCE_CACHE_DIR.glob("ref_primes_*.bin"):
+        if old != path:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+@lru_cache(maxsize=1)
+def reference_primes_up_to(limit):
+    """
+    Primi di riferimento fino a limit, come array di uint64 (da non modificare), dal
+    crivello di Eratostene su un bytearray: ogni cancellazione è una scrittura a passo
+    i in C, indipendente dal crivello del motore. Oltre REFERENCE_CACHE_MIN la tabella
+    è salvata su disco e riletta, verificata, dalle esecuzioni successive; l'ultima
+    resta anche in memoria.
+    """
+    if limit < 2:
+        return array('Q')
+    if limit > REFERENCE_CACHE_MIN:
+        primes = _load_reference(limit)
+        if primes is not None:
+            return primes
+    sieve = bytearray(b"\x01") * (limit + 1)
+    sieve[0] = sieve[1] = 0
+    for i in range(2, isqrt(limit) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, limit + 1, i)))
+    primes = array('Q', compress(range(limit + 1), sieve))
+    if limit > REFERENCE_CACHE_MIN:
+        _save_reference(limit, primes)
+    return primes
+
 def test_prime_engine(limit=1000):
     """Testa il motore fino al limite specificato."""
     print(f"=== TEST VALIDAZIONE PRIMI FINO A {limit} ===\n")
     
-    n = 1
-    count = 0
     false_positives = []
     missed_primes = []
     
-    # Genera tutti i primi dal motore
-    engine_primes = []
-    while True:
-        p = next_prime_binary(n)
-        if p > limit:
-            break
-        engine_primes.append(p)
-        n = p + 1
-        count += 1
+    # Genera tutti i primi dal motore con un solo passaggio del crivello a segmenti,
+    # invece di una chiamata a next_prime_binary per ogni primo
+    engine_primes = list(segmented_prime_iter(2, stop=limit + 1))
     
-    print(f"Primi generati dal motore: {count}")
+    print(f"Primi generati dal motore: {len(engine_primes)}")
     print(f"Primi: {engine_primes[:20]}{'...' if len(engine_primes) > 20 else ''}\n")
     
-    # Verifica ogni primo generato
-    for p in engine_primes:
-        if not is_prime_reference(p):
-            false_positives.append(p)
+    # Trova tutti i primi di riferimento, ricontrollati a campione
+    reference_primes = reference_primes_up_to(limit)
+    reference_ok = _spot_check(reference_primes, limit)
     
-    # Trova tutti i primi di riferimento
-    reference_primes = [n for n in range(2, limit + 1) if is_prime_reference(n)]
+    # Sequenze identiche: né falsi positivi né primi mancanti, senza altre scansioni
+    if array('Q', engine_primes) != reference_primes:
+        # Appartenenza su insiemi, O(1) per primo invece di una scansione della lista
+        engine_set = set(engine_primes)
+        reference_set = set(reference_primes)
+        
+        # Verifica ogni primo generato (tutti <= limit, quindi coperti dal riferimento)
+        false_positives = [p for p in engine_primes if p not in reference_set]
+        
+        # Verifica se abbiamo perso dei primi
+        missed_primes = [p for p in reference_primes if p not in engine_set]
     
-    # Verifica se abbiamo perso dei primi
-    for p in reference_primes:
-        if p not in engine_primes:
-            missed_primes.append(p)
+    # Anche la ricerca del motore resta validata: da ogni primo del crivello
+    # next_prime_binary deve trovare il successivo (una chiamata per primo)
+    pairs = zip(engine_primes, engine_primes[1:])
+    next_prime_errors = [(p, q) for p, q in pairs if next_prime_binary(p + 1) != q]
     
     # Risultati
     print("=== RISULTATI TEST ===")
@@ -66,24 +205,38 @@ def test_prime_engine(limit=1000):
     if missed_primes:
         print(f"   Primi non trovati: {missed_primes}")
     
+    print(f"❌ Errori next_prime_binary: {len(next_prime_errors)}")
+    if next_prime_errors:
+        print(f"   Coppie (primo, successivo atteso): {next_prime_errors[:10]}")
+    
     print(f"📊 Riferimento (totale primi fino a {limit}): {len(reference_primes)}")
+    if not reference_ok:
+        print("❌ Tabella di riferimento smentita da is_prime_reference: "
+              "risultati non affidabili")
     
     # Test specifici per i primi piccoli
     print("\n=== TEST PRIMI PICCOLI ===")
     small_primes = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47]
+    # Righe raccolte e scritte con una sola write
+    lines = []
     for i, expected in enumerate(small_primes):
         if i < len(engine_primes):
             generated = engine_primes[i]
             status = "✅" if generated == expected else "❌"
-            print(f"p{i+1}: generato={generated}, atteso={expected} {status}")
+            lines.append(f"p{i+1}: generato={generated}, atteso={expected} {status}")
         else:
-            print(f"p{i+1}: mancante, atteso={expected} ❌")
+            lines.append(f"p{i+1}: mancante, atteso={expected} ❌")
+    sys.stdout.write("\n".join(lines) + "\n")
     
-    return len(false_positives) == 0 and len(missed_primes) == 0
+    return (reference_ok and len(false_positives) == 0 and len(missed_primes) == 0
+            and not next_prime_errors)
 
-if __name__ == "__main__":
+def main(argv=None):
+    """Esegue la validazione; argv come sys.argv[1:] (limite opzionale)."""
+    if argv is None:
+        argv = sys.argv[1:]
     # Test con limite personalizzabile
-    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    limit = int(argv[0]) if argv else 1000
     
     success = test_prime_engine(limit)
     
@@ -93,3 +246,7 @@ if __name__ == "__main__":
     else:
         print("⚠️  ATTENZIONE: Trovati errori nella generazione!")
     print(f"{'='*50}")
+    return success
+
+if __name__ == "__main__":
+    main()
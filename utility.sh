@@ -67,10 +67,18 @@ backup_db() {
         cp binary_codes.json "backup_binary_codes_${timestamp}.json"
         print_status "Backup salvato: backup_binary_codes_${timestamp}.json"
     fi
+    if [ -f "binary_codes.bin" ]; then
+        cp binary_codes.bin "backup_binary_codes_${timestamp}.bin"
+        print_status "Backup salvato: backup_binary_codes_${timestamp}.bin"
+    fi
     if [ -f "binary_codes_pro.json" ]; then
         cp binary_codes_pro.json "backup_binary_codes_pro_${timestamp}.json"
         print_status "Backup salvato: backup_binary_codes_pro_${timestamp}.json"
     fi
+    if [ -f "binary_codes_pro.bin" ]; then
+        cp binary_codes_pro.bin "backup_binary_codes_pro_${timestamp}.bin"
+        print_status "Backup salvato: backup_binary_codes_pro_${timestamp}.bin"
+    fi
 }
 
 # Mostra statistiche
@@ -80,10 +88,18 @@ show_stats() {
         size=$(wc -c < binary_codes.json)
         print_status "binary_codes.json: ${size} bytes"
     fi
+    if [ -f "binary_codes.bin" ]; then
+        size=$(wc -c < binary_codes.bin)
+        print_status "binary_codes.bin: ${size} bytes"
+    fi
     if [ -f "binary_codes_pro.json" ]; then
         size=$(wc -c < binary_codes_pro.json)
         print_status "binary_codes_pro.json: ${size} bytes"
     fi
+    if [ -f "binary_codes_pro.bin" ]; then
+        size=$(wc -c < binary_codes_pro.bin)
+        print_status "binary_codes_pro.bin: ${size} bytes"
+    fi
     if [ -f "prime_engine.log" ]; then
         lines=$(wc -l < prime_engine.log)
         print_status "prime_engine.log: ${lines} linee"